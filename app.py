@@ -1,16 +1,16 @@
 import os
-from flask import Flask, jsonify, request, render_template, redirect, url_for, session, flash
+from flask import Flask, Response, jsonify, request, render_template, redirect, url_for, session, flash, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_migrate import Migrate
-from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 import click
+from functools import wraps
 
 # Load environment variables
 load_dotenv()
 
-def create_app(config_name=None):
+def create_app(config_name=None, config_overrides=None):
     """Application factory pattern"""
     app = Flask(__name__, 
                 template_folder='templates',
@@ -20,13 +20,40 @@ def create_app(config_name=None):
     config_name = config_name or os.environ.get('FLASK_ENV', 'development')
     from config import config
     app.config.from_object(config[config_name])
+    app.config.update(config_overrides or {})
     
     # Import db from models and initialize
-    from models import db, User, Product, Category, Order, OrderItem, Cart, CartItem
+    from models import (
+        db, User, Product, Category, Order, OrderItem, Cart, CartItem, StockReservation, ProductRecommendation,
+        SalesDaily, SalesDailyProduct, SalesDailyCategory
+    )
+    from services import (
+        catalog_cache, page_cache, load_active_cart, add_cart_item, set_cart_item_quantity, remove_cart_item,
+        apply_cart_operations, serialize_cart, CartOperationError, place_order, EmptyCartError, OutOfStockError,
+        InvalidCartLineError, list_categories, get_category, get_category_by_name, page_products, featured_products, InvalidQueryError,
+        search_products, remember_identity, current_user_proxy,
+        password_hasher, PasswordHasherBusy, request_metrics,
+        import_catalog, CatalogImportError, SEED_CATALOG,
+        export_orders, parse_export_filters, EXPORT_FORMATS,
+        page_orders, order_summaries, serialize_order, sqlite_tuning,
+        backup_database, BackupError, BACKUP_COMPRESSIONS, replica_routing, replica_reads,
+        available_to_sell, sweep_reservations, reservation_sweeper, InsufficientStockError,
+        build_recommendations, related_products, catch_up_rollups, rebuild_rollups, sales_analytics,
+        asset_pipeline, build_assets, ASSET_COMPRESSIONS
+    )
+    # Replicas are registered as binds, so this must run before db.init_app
+    replica_routing.init_app(app)
     db.init_app(app)
+    sqlite_tuning.init_app(app)
     
     # Initialize extensions
     jwt = JWTManager(app)
+    catalog_cache.init_app(app)
+    page_cache.init_app(app)
+    asset_pipeline.init_app(app)
+    password_hasher.init_app(app)
+    request_metrics.init_app(app)
+    reservation_sweeper.init_app(app)
     CORS(app)
     migrate = Migrate(app, db)
     
@@ -48,40 +75,29 @@ def create_app(config_name=None):
             click.echo('⚠️  Dados já existem. Use --force para recriar.')
             return
         
-        # Cria categorias
-        categories = [
-            Category(name='Vinhos'),
-            Category(name='Whiskies'),
-            Category(name='Cervejas')
-        ]
-        
-        for cat in categories:
-            db.session.add(cat)
-        
-        db.session.commit()
-        
-        # Cria produtos expandidos
-        products = [
-            Product(name='Vinho Tinto Premium', description='Vinho tinto encorpado com notas de frutas vermelhas', price=89.90, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-            Product(name='Whisky Single Malt', description='Whisky escocês envelhecido por 12 anos', price=250.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-            Product(name='Cerveja Artesanal IPA', description='India Pale Ale com lúpulos aromáticos', price=25.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-            Product(name='Vinho Branco Seco', description='Vinho branco refrescante e mineral', price=65.90, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-            Product(name='Bourbon Premium', description='Bourbon americano envelhecido em carvalho', price=180.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-            Product(name='Cerveja Pilsner', description='Cerveja lager clara e refrescante', price=18.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-            Product(name='Vinho Rosé Premium', description='Vinho rosé delicado com notas florais', price=72.90, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-            Product(name='Whisky Japonês', description='Whisky japonês suave e equilibrado', price=320.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-            Product(name='Cerveja Stout Imperial', description='Cerveja escura e encorpada', price=28.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-            Product(name='Champagne Dom Pérignon', description='Champagne francês de luxo', price=899.00, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-            Product(name='Whisky Macallan 18', description='Single malt escocês envelhecido 18 anos', price=1200.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-            Product(name='Cerveja Weiss', description='Cerveja de trigo alemã tradicional', price=19.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-        ]
-        
-        for prod in products:
-            db.session.add(prod)
-        
-        db.session.commit()
-        
-        click.echo(f'✅ Banco populado com {len(categories)} categorias e {len(products)} produtos!')
+        stats = import_catalog(SEED_CATALOG)
+        click.echo(f'✅ Banco populado com {stats["categories"]} categorias e {stats["products"]} produtos!')
+
+    @app.cli.command('import-catalog')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Padrão: pela extensão do arquivo')
+    @click.option('--chunk-size', default=1000, show_default=True, help='Linhas por transação')
+    def import_catalog_command(path, fmt, chunk_size):
+        """Importa categorias e produtos de um CSV/JSONL (upsert por sku)"""
+        click.echo(f'📦 Importando catálogo de {path}...')
+
+        def progress(stats, elapsed):
+            click.echo(f'   {stats["rows"]} linhas ({stats["rows"] / elapsed:.0f} linhas/s)')
+
+        try:
+            stats = import_catalog(path, fmt, chunk_size, progress)
+        except CatalogImportError as e:
+            click.echo(f'❌ Erro na importação: {e}')
+            raise SystemExit(1)
+
+        click.echo(f'✅ {stats["rows"]} linhas em {stats["seconds"]:.1f}s '
+                   f'({stats["rows_per_second"]:.0f} linhas/s): '
+                   f'{stats["products"]} produtos gravados, {stats["categories"]} categorias novas')
 
     @app.cli.command()
     @click.option('--force', is_flag=True, help='Força a recriação do banco')
@@ -116,6 +132,11 @@ def create_app(config_name=None):
             ('cart_item', CartItem),
             ('order', Order),
             ('order_item', OrderItem),
+            ('stock_reservation', StockReservation),
+            ('product_recommendation', ProductRecommendation),
+            ('sales_daily', SalesDaily),
+            ('sales_daily_product', SalesDailyProduct),
+            ('sales_daily_category', SalesDailyCategory),
         ]
         
         for table_name, model in tables_info:
@@ -141,7 +162,7 @@ def create_app(config_name=None):
         # Cria admin
         admin = User(
             email=email,
-            password=generate_password_hash(password),
+            password=password_hasher.hash(password),
             first_name=first_name,
             last_name=last_name,
             is_admin=True
@@ -153,47 +174,190 @@ def create_app(config_name=None):
         click.echo('✅ Administrador criado com sucesso!')
 
     @app.cli.command()
-    def backup_db():
-        """Cria backup do banco de dados"""
-        from datetime import datetime
-        import shutil
-        
-        if not os.path.exists('instance/ecommerce.db'):
-            click.echo('❌ Banco de dados não encontrado!')
-            return
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_dir = 'backups'
-        backup_file = f'backup_ecommerce_{timestamp}.db'
-        
-        os.makedirs(backup_dir, exist_ok=True)
-        
+    @click.option('--output-dir', help='Diretório dos backups (padrão: BACKUP_DIR)')
+    @click.option('--compression', type=click.Choice(BACKUP_COMPRESSIONS), help='Padrão: BACKUP_COMPRESSION')
+    @click.option('--keep', type=int, help='Quantos backups manter (padrão: BACKUP_KEEP)')
+    @click.option('--max-age-days', type=int, help='Remove backups mais antigos (padrão: BACKUP_MAX_AGE_DAYS)')
+    def backup_db(output_dir, compression, keep, max_age_days):
+        """Cria backup online do banco de dados (com verificação e retenção)"""
+        click.echo('💾 Criando backup...')
         try:
-            shutil.copy('instance/ecommerce.db', f'{backup_dir}/{backup_file}')
-            click.echo(f'✅ Backup criado: {backup_dir}/{backup_file}')
-        except Exception as e:
+            stats = backup_database(output_dir, compression, keep, max_age_days)
+        except (BackupError, RuntimeError) as e:
             click.echo(f'❌ Erro ao criar backup: {e}')
+            raise SystemExit(1)
+        
+        click.echo(f'✅ Backup criado: {stats["path"]} ({stats["bytes"] / 1024 / 1024:.1f} MB '
+                   f'em {stats["seconds"]:.1f}s, integridade {stats["integrity"]})')
+        for path in stats['removed']:
+            click.echo(f'🧹 Removido pela retenção: {path}')
+
+    @app.cli.command('sweep-reservations')
+    @click.option('--batch-size', type=int, help='Reservas por transação (padrão: RESERVATION_SWEEP_BATCH)')
+    def sweep_reservations_command(batch_size):
+        """Libera reservas de estoque vencidas e aplica as convertidas ao estoque"""
+        stats = sweep_reservations(batch_size or app.config['RESERVATION_SWEEP_BATCH'])
+        click.echo(f'🧹 {stats["expired"]} reservas vencidas liberadas, '
+                   f'{stats["applied"]} convertidas aplicadas ao estoque')
+
+    @app.cli.command('build-assets')
+    @click.option('--compression', 'compressions', multiple=True, type=click.Choice(ASSET_COMPRESSIONS),
+                  help='Variantes comprimidas (padrão: ASSET_COMPRESSIONS); repita para várias')
+    def build_assets_command(compressions):
+        """Gera os arquivos estáticos com hash no nome, .gz/.br e o manifest"""
+        state = app.extensions['asset_pipeline']
+        try:
+            stats = build_assets(app.static_folder, state['build_dir'],
+                                 compressions or app.config['ASSET_COMPRESSIONS'])
+        except RuntimeError as e:
+            click.echo(f'❌ {e}')
+            raise SystemExit(1)
+        
+        for name, hashed in sorted(stats['manifest'].items()):
+            click.echo(f'   {name} → {hashed}')
+        sizes = ', '.join(f'{name} {size / 1024:.1f} KB' for name, size in stats['compressed_bytes'].items())
+        click.echo(f'✅ {stats["files"]} arquivos ({stats["bytes"] / 1024:.1f} KB; {sizes}) em {state["build_dir"]}')
+
+    @app.cli.command('build-recommendations')
+    @click.option('--top-k', type=int, help='Relacionados guardados por produto (padrão: RECOMMENDATIONS_TOP_K)')
+    @click.option('--min-support', type=int, default=1, show_default=True,
+                  help='Pedidos em comum para relacionar dois produtos')
+    @click.option('--chunk-size', type=int, default=50000, show_default=True, help='Itens de pedido por consulta')
+    def build_recommendations_command(top_k, min_support, chunk_size):
+        """Recalcula os produtos relacionados a partir dos pedidos (requer numpy e scipy)"""
+        click.echo('🧮 Calculando produtos relacionados...')
+        try:
+            stats = build_recommendations(top_k or app.config['RECOMMENDATIONS_TOP_K'], min_support, chunk_size)
+        except RuntimeError as e:
+            click.echo(f'❌ {e}')
+            raise SystemExit(1)
+        
+        click.echo(f'✅ {stats["recommendations"]} recomendações para {stats["products"]} produtos '
+                   f'({stats["lines"]} itens de {stats["orders"]} pedidos)')
+
+    @app.cli.command('rollup-sales')
+    @click.option('--rebuild', is_flag=True, help='Refaz os rollups do zero a partir de todos os pedidos')
+    @click.option('--chunk-size', type=int, default=1000, show_default=True, help='Pedidos por transação')
+    def rollup_sales_command(rebuild, chunk_size):
+        """Soma aos rollups de vendas os pedidos que ainda não entraram"""
+        if rebuild:
+            click.echo('🔁 Refazendo os rollups de vendas do zero...')
+            stats = rebuild_rollups(chunk_size)
+        else:
+            stats = catch_up_rollups(chunk_size)
+        click.echo(f'📊 {stats["orders"]} pedidos somados aos rollups em {stats["chunks"]} blocos')
+
+    @app.cli.command('export-orders')
+    @click.option('--start', help='Data inicial (YYYY-MM-DD)')
+    @click.option('--end', help='Data final, inclusiva (YYYY-MM-DD)')
+    @click.option('--status', help='Filtra pelo status do pedido')
+    @click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+    @click.option('--output', '-o', default='-', help='Arquivo de saída (padrão: stdout; .gz comprime)')
+    @click.option('--gzip', 'compress', is_flag=True, help='Comprime a saída com gzip')
+    def export_orders_command(start, end, status, fmt, output, compress):
+        """Exporta os itens de pedidos em streaming (CSV ou NDJSON)"""
+        import time
+
+        try:
+            filters = parse_export_filters(start, end, status)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+
+        started = time.perf_counter()
+        written = 0
+        with click.open_file(output, 'wb') as stream:
+            for chunk in export_orders(fmt, compress or output.endswith('.gz'), **filters):
+                stream.write(chunk)
+                written += len(chunk)
+
+        click.echo(f'✅ {written / 1e6:.1f} MB exportados em {time.perf_counter() - started:.1f}s', err=True)
+
+    @app.cli.command()
+    @click.option('--database-url', default='sqlite://',
+                  help='Banco de rascunho (será populado e alterado)')
+    @click.option('--verbose', is_flag=True, help='Mostra o plano de todas as consultas')
+    def check_query_plans(database_url, verbose):
+        """Verifica se as consultas dos endpoints usam índices"""
+        from services.query_plans import check_query_plans as run_check, ScenarioError
+        
+        click.echo(f'🔍 Verificando planos de consulta em {database_url}...')
+        scratch = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': database_url,
+            'CATALOG_CACHE_ENABLED': False,
+        })
+        
+        try:
+            results = run_check(scratch)
+        except ScenarioError as e:
+            click.echo(f'❌ Falha ao executar o cenário: {e}')
+            raise SystemExit(1)
+        
+        failures = 0
+        for label, statement, plan, scans in results:
+            if scans:
+                failures += 1
+                click.echo(f'  ❌ {label}: varredura completa em {", ".join(scans)}')
+            elif verbose:
+                click.echo(f'  ✅ {label}')
+            if scans or verbose:
+                click.echo(f'     {" ".join(statement.split())}')
+                for line in plan:
+                    click.echo(f'     └── {line}')
+        
+        if failures:
+            click.echo(f'❌ {failures} consulta(s) sem índice adequado.')
+            raise SystemExit(1)
+        click.echo('✅ Todas as consultas usam índices.')
 
     # Helper function to check if user is logged in
     def is_authenticated():
         return 'user_id' in session
 
-    def get_current_user():
-        if is_authenticated():
-            return User.query.get(session['user_id'])
-        return None
+    def upgrade_password_hash(user, password):
+        # Transparently move old hashes to the configured algorithm/cost
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(password)
+            db.session.commit()
+
+    def admin_required(view):
+        # JWT-authenticated API views restricted to administrators
+        @wraps(view)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            user = db.session.get(User, get_jwt_identity())
+            if not user or not user.is_admin:
+                return jsonify({'message': 'Admin access required'}), 403
+            return view(*args, **kwargs)
+        return wrapper
+
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(e):
+        if request.path.startswith('/api/'):
+            return jsonify({'message': 'Service busy, try again shortly'}), 503, {'Retry-After': '1'}
+        flash('Serviço temporariamente sobrecarregado. Tente novamente.', 'error')
+        return redirect(request.path)
 
     # Template context processors
     @app.context_processor
     def inject_user():
-        return dict(current_user=get_current_user(), is_authenticated=is_authenticated())
+        # The proxy only hits the database if a template reads a field
+        # missing from the session snapshot
+        return dict(current_user=current_user_proxy(), is_authenticated=is_authenticated())
+
+    @app.template_global()
+    def category_url(name):
+        # Category ids depend on creation order, so templates link by name
+        category = get_category_by_name(name)
+        if category is None:
+            return url_for('products_page')
+        return url_for('products_page', category_id=category['id'])
 
     # Frontend Routes
     @app.route('/')
+    @replica_reads
     def home():
-        categories = Category.query.all()
-        featured_products = Product.query.limit(8).all()
-        return render_template('index.html', categories=categories, featured_products=featured_products)
+        return page_cache.render('index.html', 'home', lambda: dict(
+            categories=list_categories(), featured_products=featured_products()))
 
     @app.route('/login')
     def login_page():
@@ -209,53 +373,62 @@ def create_app(config_name=None):
 
     @app.route('/products')
     @app.route('/products/<int:category_id>')
+    @replica_reads
     def products_page(category_id=None):
-        categories = Category.query.all()
-        if category_id:
-            products = Product.query.filter_by(category_id=category_id).all()
-            current_category = Category.query.get(category_id)
-        else:
-            products = Product.query.all()
-            current_category = None
+        sort = request.args.get('sort', 'id')
+        cursor = request.args.get('cursor')
+        search_query = request.args.get('q', '').strip()
+        
+        if search_query:
+            return render_template('products.html',
+                                 products=search_products(search_query, category_id, limit=48),
+                                 next_cursor=None,
+                                 sort=sort,
+                                 is_first_page=True,
+                                 search_query=search_query,
+                                 categories=list_categories(),
+                                 current_category=get_category(category_id) if category_id else None)
+        
+        def load_page():
+            page = page_products(category_id, sort=sort, cursor=cursor)
+            return dict(products=page['items'],
+                        next_cursor=page['next_cursor'],
+                        sort=sort,
+                        is_first_page=not cursor,
+                        categories=list_categories(),
+                        current_category=get_category(category_id) if category_id else None)
         
-        return render_template('products.html', 
-                             products=products, 
-                             categories=categories, 
-                             current_category=current_category)
+        try:
+            return page_cache.render('products.html', f"products:{category_id or ''}:{sort}:{cursor or ''}", load_page)
+        except InvalidQueryError:
+            return redirect(url_for('products_page', category_id=category_id))
 
     @app.route('/product/<int:product_id>')
+    @replica_reads
     def product_detail_page(product_id):
-        product = Product.query.get_or_404(product_id)
-        related_products = Product.query.filter(
-            Product.category_id == product.category_id,
-            Product.id != product.id
-        ).limit(4).all()
+        # The page only shows "sold out" or "last N units" (N <= 5), so above
+        # that every stock level renders the same markup
+        available = available_to_sell([product_id]).get(product_id, 0)
+        
+        def load_page():
+            product = Product.query.get_or_404(product_id)
+            return dict(product=product, available=available, related_products=related_products(product.id))
         
-        return render_template('product_detail.html', 
-                             product=product, 
-                             related_products=related_products)
+        return page_cache.render('product_detail.html', f'product:{product_id}:{min(available, 6)}',
+                                 load_page)
 
     @app.route('/cart')
     def cart_page():
         if not is_authenticated():
             return redirect(url_for('login_page'))
         
-        user = get_current_user()
-        cart = Cart.query.filter_by(user_id=user.id, is_active=True).first()
-        cart_items = []
-        total = 0
-        
-        if cart:
-            cart_items_db = CartItem.query.filter_by(cart_id=cart.id).all()
-            for item in cart_items_db:
-                product = Product.query.get(item.product_id)
-                cart_items.append({
-                    'id': item.id,
-                    'product': product,
-                    'quantity': item.quantity,
-                    'subtotal': product.price * item.quantity
-                })
-                total += product.price * item.quantity
+        _, lines, total = load_active_cart(session['user_id'])
+        cart_items = [{
+            'id': item.id,
+            'product': product,
+            'quantity': item.quantity,
+            'subtotal': product.price * item.quantity
+        } for item, product in lines]
         
         return render_template('cart.html', cart_items=cart_items, total=total)
 
@@ -266,13 +439,16 @@ def create_app(config_name=None):
         return render_template('checkout.html')
 
     @app.route('/profile')
+    @replica_reads
     def profile_page():
         if not is_authenticated():
             return redirect(url_for('login_page'))
         
-        user = get_current_user()
-        orders = Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc()).all()
-        return render_template('profile.html', orders=orders)
+        try:
+            page = page_orders(session['user_id'], cursor=request.args.get('cursor'), with_items=True)
+        except InvalidQueryError:
+            return redirect(url_for('profile_page'))
+        return render_template('profile.html', orders=page['orders'], next_cursor=page['next_cursor'])
 
     @app.route('/logout')
     def logout():
@@ -288,12 +464,12 @@ def create_app(config_name=None):
         
         user = User.query.filter_by(email=email).first()
         
-        if not user or not check_password_hash(user.password, password):
+        if not user or not password_hasher.verify(user.password, password):
             flash('Credenciais inválidas', 'error')
             return redirect(url_for('login_page'))
         
-        session['user_id'] = user.id
-        session['is_admin'] = user.is_admin
+        remember_identity(user)
+        upgrade_password_hash(user, password)
         flash('Login realizado com sucesso!', 'success')
         return redirect(url_for('home'))
 
@@ -310,7 +486,7 @@ def create_app(config_name=None):
             return redirect(url_for('register_page'))
         
         # Create new user
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         new_user = User(
             email=email,
             password=hashed_password,
@@ -322,8 +498,7 @@ def create_app(config_name=None):
         db.session.add(new_user)
         db.session.commit()
         
-        session['user_id'] = new_user.id
-        session['is_admin'] = new_user.is_admin
+        remember_identity(new_user)
         flash('Conta criada com sucesso!', 'success')
         return redirect(url_for('home'))
 
@@ -337,7 +512,7 @@ def create_app(config_name=None):
             return jsonify({'message': 'User already exists'}), 409
         
         # Create new user
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = password_hasher.hash(data['password'])
         new_user = User(
             email=data['email'],
             password=hashed_password,
@@ -357,65 +532,102 @@ def create_app(config_name=None):
         
         user = User.query.filter_by(email=data['email']).first()
         
-        if not user or not check_password_hash(user.password, data['password']):
+        if not user or not password_hasher.verify(user.password, data['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
         
         access_token = create_access_token(identity=user.id)
-        return jsonify(access_token=access_token, user_id=user.id, is_admin=user.is_admin), 200
+        response = jsonify(access_token=access_token, user_id=user.id, is_admin=user.is_admin)
+        upgrade_password_hash(user, data['password'])
+        return response, 200
 
     @app.route('/api/products', methods=['GET'])
+    @replica_reads
     def get_products():
-        category_id = request.args.get('category_id')
-        
-        if category_id:
-            products = Product.query.filter_by(category_id=category_id).all()
-        else:
-            products = Product.query.all()
+        category_id = request.args.get('category_id', type=int)
+        fields = request.args.get('fields')
         
-        return jsonify([{
-            'id': product.id,
-            'name': product.name,
-            'description': product.description,
-            'price': product.price,
-            'image_url': product.image_url,
-            'category_id': product.category_id
-        } for product in products]), 200
+        try:
+            page = page_products(
+                category_id,
+                sort=request.args.get('sort', 'id'),
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                fields=fields.split(',') if fields else None
+            )
+        except InvalidQueryError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        response = jsonify(page['items'])
+        if page['next_cursor']:
+            response.headers['X-Next-Cursor'] = page['next_cursor']
+            next_url = url_for('get_products', _external=True,
+                               **dict(request.args.items(), cursor=page['next_cursor']))
+            response.headers['Link'] = f'<{next_url}>; rel="next"'
+        return response, 200
+
+    @app.route('/api/products/search', methods=['GET'])
+    @replica_reads
+    def search_products_api():
+        q = request.args.get('q', '').strip()
+        if not q:
+            return jsonify({'message': 'Missing query parameter: q'}), 400
+        
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        return jsonify(search_products(q, request.args.get('category_id', type=int), limit)), 200
+
+    @app.route('/api/products/availability', methods=['GET'])
+    def get_availability():
+        try:
+            product_ids = [int(value) for value in request.args.get('ids', '').split(',') if value]
+        except ValueError:
+            return jsonify({'message': 'ids must be a comma-separated list of integers'}), 400
+        if not product_ids or len(product_ids) > 100:
+            return jsonify({'message': 'Provide between 1 and 100 ids'}), 400
+        
+        available = available_to_sell(product_ids)
+        return jsonify({str(product_id): quantity for product_id, quantity in available.items()}), 200
+
+    @app.route('/api/products/<int:product_id>/related', methods=['GET'])
+    @replica_reads
+    def get_related_products(product_id):
+        limit = max(1, min(request.args.get('limit', 4, type=int), app.config['RECOMMENDATIONS_TOP_K']))
+        related = related_products(product_id, limit)
+        if related is None:
+            return jsonify({'message': 'Product not found'}), 404
+        return jsonify(related), 200
 
     @app.route('/api/categories', methods=['GET'])
+    @replica_reads
     def get_categories():
-        categories = Category.query.all()
-        return jsonify([{
-            'id': category.id,
-            'name': category.name
-        } for category in categories]), 200
+        return jsonify(list_categories()), 200
+
+    @app.route('/api/cache/stats', methods=['GET'])
+    def get_cache_stats():
+        return jsonify({**catalog_cache.stats(), 'pages': page_cache.stats()}), 200
 
     @app.route('/api/cart', methods=['GET'])
     @jwt_required()
     def get_cart():
         user_id = get_jwt_identity()
         
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
-        
-        if not cart:
-            return jsonify({'items': [], 'total': 0}), 200
-        
-        cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-        items = []
-        total = 0
+        _, lines, total = load_active_cart(user_id)
+        return jsonify(serialize_cart(lines, total)), 200
+
+    @app.route('/api/cart/batch', methods=['POST'])
+    @jwt_required()
+    def cart_batch():
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
         
-        for item in cart_items:
-            product = Product.query.get(item.product_id)
-            items.append({
-                'id': item.id,
-                'product_id': item.product_id,
-                'quantity': item.quantity,
-                'price': product.price,
-                'name': product.name,
-                'image_url': product.image_url
-            })
-            total += product.price * item.quantity
+        try:
+            apply_cart_operations(user_id, data.get('operations'))
+        except InsufficientStockError as e:
+            return jsonify({'message': 'Insufficient stock', 'product_ids': e.product_ids}), 409
+        except CartOperationError as e:
+            return jsonify({'message': str(e)}), 400
         
-        return jsonify({'items': items, 'total': total}), 200
+        _, lines, total = load_active_cart(user_id)
+        return jsonify(serialize_cart(lines, total)), 200
 
     @app.route('/api/cart/add', methods=['POST'])
     @jwt_required()
@@ -423,27 +635,13 @@ def create_app(config_name=None):
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        # Get or create active cart
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
-        if not cart:
-            cart = Cart(user_id=user_id, is_active=True)
-            db.session.add(cart)
-            db.session.commit()
-        
-        # Check if product already in cart
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, product_id=data['product_id']).first()
-        
-        if cart_item:
-            cart_item.quantity += data['quantity']
-        else:
-            cart_item = CartItem(
-                cart_id=cart.id,
-                product_id=data['product_id'],
-                quantity=data['quantity']
-            )
-            db.session.add(cart_item)
+        try:
+            add_cart_item(user_id, data.get('product_id'), data.get('quantity'))
+        except InsufficientStockError as e:
+            return jsonify({'message': 'Insufficient stock', 'product_ids': e.product_ids}), 409
+        except CartOperationError as e:
+            return jsonify({'message': str(e)}), 400
         
-        db.session.commit()
         return jsonify({'message': 'Item added to cart'}), 200
 
     @app.route('/api/cart/update', methods=['PUT'])
@@ -452,16 +650,13 @@ def create_app(config_name=None):
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
-        if not cart:
-            return jsonify({'message': 'Cart not found'}), 404
-        
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, id=data['item_id']).first()
-        if not cart_item:
-            return jsonify({'message': 'Item not found in cart'}), 404
-        
-        cart_item.quantity = data['quantity']
-        db.session.commit()
+        try:
+            if not set_cart_item_quantity(user_id, data.get('item_id'), data.get('quantity')):
+                return jsonify({'message': 'Item not found in cart'}), 404
+        except InsufficientStockError as e:
+            return jsonify({'message': 'Insufficient stock', 'product_ids': e.product_ids}), 409
+        except CartOperationError as e:
+            return jsonify({'message': str(e)}), 400
         
         return jsonify({'message': 'Cart updated'}), 200
 
@@ -471,17 +666,9 @@ def create_app(config_name=None):
         user_id = get_jwt_identity()
         item_id = request.args.get('item_id')
         
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
-        if not cart:
-            return jsonify({'message': 'Cart not found'}), 404
-        
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, id=item_id).first()
-        if not cart_item:
+        if not remove_cart_item(user_id, item_id):
             return jsonify({'message': 'Item not found in cart'}), 404
         
-        db.session.delete(cart_item)
-        db.session.commit()
-        
         return jsonify({'message': 'Item removed from cart'}), 200
 
     @app.route('/api/checkout', methods=['POST'])
@@ -490,57 +677,81 @@ def create_app(config_name=None):
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        # Get active cart
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
-        if not cart or not CartItem.query.filter_by(cart_id=cart.id).first():
-            return jsonify({'message': 'Cart is empty'}), 400
-        
-        # Create new order
-        new_order = Order(
-            user_id=user_id,
-            total_amount=data['total_amount'],
-            shipping_address=data['shipping_address'],
-            payment_method=data['payment_method'],
-            status='pending'
-        )
-        db.session.add(new_order)
-        db.session.commit()
-        
-        # Create order items from cart items
-        cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-        for item in cart_items:
-            product = Product.query.get(item.product_id)
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                price=product.price
+        try:
+            order_id = place_order(
+                user_id,
+                shipping_address=data['shipping_address'],
+                payment_method=data['payment_method']
             )
-            db.session.add(order_item)
-        
-        # Mark cart as inactive
-        cart.is_active = False
-        db.session.commit()
+        except EmptyCartError:
+            return jsonify({'message': 'Cart is empty'}), 400
+        except InvalidCartLineError as e:
+            return jsonify({'message': 'Invalid cart quantity', 'product_ids': e.product_ids}), 400
+        except OutOfStockError as e:
+            return jsonify({'message': 'Insufficient stock', 'product_ids': e.product_ids}), 409
         
-        return jsonify({'message': 'Order placed successfully', 'order_id': new_order.id}), 201
+        return jsonify({'message': 'Order placed successfully', 'order_id': order_id}), 201
 
     @app.route('/api/user/orders', methods=['GET'])
     @jwt_required()
+    @replica_reads
     def get_user_orders():
         user_id = get_jwt_identity()
+        include = set(filter(None, request.args.get('include', '').split(',')))
+        if include - {'items', 'summary'}:
+            return jsonify({'message': f'Unknown include: {",".join(sorted(include - {"items", "summary"}))}'}), 400
+        
+        try:
+            page = page_orders(user_id, limit=request.args.get('limit', type=int),
+                               cursor=request.args.get('cursor'), with_items='items' in include)
+        except InvalidQueryError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        orders = page['orders']
+        summaries = order_summaries([order.id for order in orders]) if 'summary' in include else {}
+        response = jsonify([serialize_order(order, summaries.get(order.id), 'items' in include) for order in orders])
+        if page['next_cursor']:
+            response.headers['X-Next-Cursor'] = page['next_cursor']
+            next_url = url_for('get_user_orders', _external=True,
+                               **dict(request.args.items(), cursor=page['next_cursor']))
+            response.headers['Link'] = f'<{next_url}>; rel="next"'
+        return response, 200
+
+    @app.route('/api/admin/orders/export', methods=['GET'])
+    @admin_required
+    def export_orders_api():
+        fmt = request.args.get('format', 'csv')
+        compress = request.args.get('compress') == 'gzip'
+        try:
+            filters = parse_export_filters(request.args.get('start'), request.args.get('end'),
+                                           request.args.get('status'))
+            chunks = export_orders(fmt, compress, **filters)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        filename = f'orders.{fmt}' + ('.gz' if compress else '')
+        mimetype = 'application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+        return Response(stream_with_context(chunks), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+    @app.route('/api/admin/analytics', methods=['GET'])
+    @admin_required
+    @replica_reads
+    def analytics_api():
+        try:
+            filters = parse_export_filters(request.args.get('start'), request.args.get('end'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
         
-        orders = Order.query.filter_by(user_id=user_id).all()
-        return jsonify([{
-            'id': order.id,
-            'date': order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'total_amount': order.total_amount,
-            'status': order.status
-        } for order in orders]), 200
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        return jsonify(sales_analytics(filters['start_at'], filters['end_before'], limit)), 200
 
     @app.route('/verify-age', methods=['POST'])
     def verify_age():
-        session['age_verified'] = True
-        return jsonify({'status': 'success'})
+        # A cookie read by the page, not the session, so cached pages stay shared
+        response = jsonify({'status': 'success'})
+        response.set_cookie('age_verified', '1', max_age=365 * 24 * 3600, samesite='Lax')
+        return response
 
     return app
 
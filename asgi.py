@@ -0,0 +1,237 @@
+"""
+Ponto de entrada ASGI da API JSON (catálogo, carrinho, checkout e pedidos)
+
+Alternativa ao app.py sob gunicorn sync para as rotas dominadas por espera
+de banco: os handlers são corrotinas e usam a engine assíncrona
+(asyncpg/aiosqlite), então uma consulta lenta não prende o processo. Os
+modelos, serviços e formatos de resposta são os mesmos da aplicação Flask;
+páginas HTML, login e administração continuam no app.py.
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --workers 4
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 asgi:app
+"""
+
+from contextlib import asynccontextmanager
+
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import ExpiredSignatureError, InvalidTokenError
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app import create_app
+from services import (
+    async_db, page_products, InvalidQueryError,
+    load_active_cart, add_cart_item, set_cart_item_quantity, remove_cart_item,
+    apply_cart_operations, serialize_cart, CartOperationError,
+    place_order, EmptyCartError, InvalidCartLineError, OutOfStockError, InsufficientStockError, reservation_sweeper,
+    page_orders, order_summaries, serialize_order
+)
+
+
+class RequestError(Exception):
+    """Erro que vira uma resposta JSON com o status indicado"""
+
+    def __init__(self, status_code, body):
+        super().__init__(body)
+        self.status_code = status_code
+        self.body = body
+
+
+def int_arg(request, name, default=None):
+    # Same semantics as request.args.get(name, type=int) in Flask
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def json_body(request, *fields):
+    try:
+        data = await request.json()
+    except ValueError:
+        raise RequestError(400, {'message': 'Invalid JSON body'})
+    if not isinstance(data, dict):
+        raise RequestError(400, {'message': 'Invalid JSON body'})
+    missing = [field for field in fields if field not in data]
+    if missing:
+        raise RequestError(400, {'message': f'Missing field: {", ".join(missing)}'})
+    return data
+
+
+def paginated(request, items, next_cursor):
+    response = JSONResponse(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return response
+
+
+def create_asgi_app(config_name=None, config_overrides=None):
+    """Cria a aplicação ASGI sobre a configuração e as extensões do Flask"""
+    flask_app = create_app(config_name, config_overrides)
+    async_db.init_app(flask_app)
+
+    def run(fn):
+        return async_db.run(flask_app, fn)
+
+    def jwt_identity(request):
+        # Same checks and error bodies as @jwt_required() with header tokens
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if not scheme:
+            raise RequestError(401, {'msg': 'Missing Authorization Header'})
+        if scheme != 'Bearer' or not token:
+            raise RequestError(422, {'msg': "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"})
+        try:
+            with flask_app.app_context():
+                claims = decode_token(token)
+        except ExpiredSignatureError:
+            raise RequestError(401, {'msg': 'Token has expired'})
+        except (InvalidTokenError, JWTExtendedException) as e:
+            raise RequestError(422, {'msg': str(e)})
+        if claims.get('type') != 'access':
+            raise RequestError(422, {'msg': 'Only non-refresh tokens are allowed'})
+        return claims[flask_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]
+
+    async def get_products(request):
+        fields = request.query_params.get('fields')
+        try:
+            page = await run(lambda session: page_products(
+                int_arg(request, 'category_id'),
+                sort=request.query_params.get('sort', 'id'),
+                limit=int_arg(request, 'limit'),
+                cursor=request.query_params.get('cursor'),
+                fields=fields.split(',') if fields else None,
+                session=session
+            ))
+        except InvalidQueryError as e:
+            return JSONResponse({'message': str(e)}, 400)
+        return paginated(request, page['items'], page['next_cursor'])
+
+    async def get_cart(request):
+        user_id = jwt_identity(request)
+
+        def load(session):
+            _, lines, total = load_active_cart(user_id, session)
+            return serialize_cart(lines, total)
+
+        return JSONResponse(await run(load))
+
+    async def cart_batch(request):
+        user_id = jwt_identity(request)
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        operations = data.get('operations') if isinstance(data, dict) else None
+
+        def apply(session):
+            apply_cart_operations(user_id, operations, session)
+            _, lines, total = load_active_cart(user_id, session)
+            return serialize_cart(lines, total)
+
+        try:
+            return JSONResponse(await run(apply))
+        except InsufficientStockError as e:
+            return JSONResponse({'message': 'Insufficient stock', 'product_ids': e.product_ids}, 409)
+        except CartOperationError as e:
+            return JSONResponse({'message': str(e)}, 400)
+
+    async def add_to_cart(request):
+        user_id = jwt_identity(request)
+        data = await json_body(request, 'product_id', 'quantity')
+        try:
+            await run(lambda session: add_cart_item(user_id, data['product_id'], data['quantity'], session))
+        except InsufficientStockError as e:
+            return JSONResponse({'message': 'Insufficient stock', 'product_ids': e.product_ids}, 409)
+        except CartOperationError as e:
+            return JSONResponse({'message': str(e)}, 400)
+        return JSONResponse({'message': 'Item added to cart'})
+
+    async def update_cart_item(request):
+        user_id = jwt_identity(request)
+        data = await json_body(request, 'item_id', 'quantity')
+        try:
+            if not await run(lambda session: set_cart_item_quantity(user_id, data['item_id'], data['quantity'],
+                                                                    session)):
+                return JSONResponse({'message': 'Item not found in cart'}, 404)
+        except InsufficientStockError as e:
+            return JSONResponse({'message': 'Insufficient stock', 'product_ids': e.product_ids}, 409)
+        except CartOperationError as e:
+            return JSONResponse({'message': str(e)}, 400)
+        return JSONResponse({'message': 'Cart updated'})
+
+    async def remove_from_cart(request):
+        user_id = jwt_identity(request)
+        item_id = request.query_params.get('item_id')
+        if not await run(lambda session: remove_cart_item(user_id, item_id, session)):
+            return JSONResponse({'message': 'Item not found in cart'}, 404)
+        return JSONResponse({'message': 'Item removed from cart'})
+
+    async def checkout(request):
+        user_id = jwt_identity(request)
+        data = await json_body(request, 'shipping_address', 'payment_method')
+        try:
+            order_id = await run(lambda session: place_order(
+                user_id,
+                shipping_address=data['shipping_address'],
+                payment_method=data['payment_method'],
+                session=session
+            ))
+        except EmptyCartError:
+            return JSONResponse({'message': 'Cart is empty'}, 400)
+        except InvalidCartLineError as e:
+            return JSONResponse({'message': 'Invalid cart quantity', 'product_ids': e.product_ids}, 400)
+        except OutOfStockError as e:
+            return JSONResponse({'message': 'Insufficient stock', 'product_ids': e.product_ids}, 409)
+        return JSONResponse({'message': 'Order placed successfully', 'order_id': order_id}, 201)
+
+    async def get_user_orders(request):
+        user_id = jwt_identity(request)
+        include = set(filter(None, request.query_params.get('include', '').split(',')))
+        if include - {'items', 'summary'}:
+            return JSONResponse({'message': f'Unknown include: {",".join(sorted(include - {"items", "summary"}))}'}, 400)
+
+        def load(session):
+            page = page_orders(user_id, limit=int_arg(request, 'limit'), cursor=request.query_params.get('cursor'),
+                               with_items='items' in include, session=session)
+            orders = page['orders']
+            summaries = order_summaries([order.id for order in orders], session) if 'summary' in include else {}
+            items = [serialize_order(order, summaries.get(order.id), 'items' in include) for order in orders]
+            return items, page['next_cursor']
+
+        try:
+            items, next_cursor = await run(load)
+        except InvalidQueryError as e:
+            return JSONResponse({'message': str(e)}, 400)
+        return paginated(request, items, next_cursor)
+
+    async def request_error(request, exc):
+        return JSONResponse(exc.body, exc.status_code)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        reservation_sweeper.start(flask_app)
+        yield
+        reservation_sweeper.stop(flask_app)
+        await async_db.dispose(flask_app)
+
+    return Starlette(
+        routes=[
+            Route('/api/products', get_products, methods=['GET']),
+            Route('/api/cart', get_cart, methods=['GET']),
+            Route('/api/cart/batch', cart_batch, methods=['POST']),
+            Route('/api/cart/add', add_to_cart, methods=['POST']),
+            Route('/api/cart/update', update_cart_item, methods=['PUT']),
+            Route('/api/cart/remove', remove_from_cart, methods=['DELETE']),
+            Route('/api/checkout', checkout, methods=['POST']),
+            Route('/api/user/orders', get_user_orders, methods=['GET']),
+        ],
+        exception_handlers={RequestError: request_error},
+        lifespan=lifespan,
+    )
+
+
+app = create_asgi_app()
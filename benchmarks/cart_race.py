@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Verificação de concorrência: toques simultâneos em "adicionar ao carrinho"
+
+Sobe a aplicação em processo (servidor threaded do Werkzeug) sobre um SQLite
+temporário e dispara, para usuários ainda sem carrinho, várias threads
+chamando POST /api/cart/add e POST /api/cart/batch para os mesmos produtos ao
+mesmo tempo. Ao final confere que cada usuário tem um único carrinho ativo,
+uma única linha por produto e que nenhum incremento foi perdido:
+
+    python benchmarks/cart_race.py --threads 16 --adds 25
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+from werkzeug.serving import make_server
+
+from app import create_app
+from harness import http
+from models import db, Cart, CartItem, Category, Product, User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=16, help='threads por usuário')
+    parser.add_argument('--adds', type=int, default=25, help='requisições por thread')
+    parser.add_argument('--database-url', help='padrão: SQLite temporário')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f'sqlite:///{tempfile.mkdtemp(prefix="cart-race-")}/race.db'
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': database_url, 'METRICS_ENABLED': False})
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Category(name='Vinhos'))
+        db.session.flush()
+        # Like the harness: every add must fit in stock, or holds would turn the race into 409s
+        db.session.add_all([Product(name=f'Produto {i}', price=10.0, stock=1_000_000, category_id=1)
+                            for i in range(2)])
+        users = [User(email=f'race{i}@bench', password='-') for i in range(args.users)]
+        db.session.add_all(users)
+        db.session.commit()
+        tokens = {user.id: create_access_token(identity=user.id) for user in users}
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    # (user_id, product_id) -> quantity acknowledged with 200
+    expected = Counter()
+    statuses = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(args.users * args.threads)
+
+    def hammer(user_id, worker):
+        start.wait()
+        for i in range(args.adds):
+            if (worker + i) % 2:
+                status, _, _ = http('POST', f'{base_url}/api/cart/add',
+                                    {'product_id': 1, 'quantity': 1}, tokens[user_id])
+                added = {1: 1}
+            else:
+                status, _, _ = http('POST', f'{base_url}/api/cart/batch', {'operations': [
+                    {'op': 'add', 'product_id': 1, 'quantity': 2},
+                    {'op': 'add', 'product_id': 2, 'quantity': 1},
+                ]}, tokens[user_id])
+                added = {1: 2, 2: 1}
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    for product_id, quantity in added.items():
+                        expected[user_id, product_id] += quantity
+
+    threads = [threading.Thread(target=hammer, args=(user_id, worker))
+               for user_id in tokens for worker in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    failures = 0
+    with app.app_context():
+        for user_id in tokens:
+            active = db.session.scalar(select(func.count()).where(Cart.user_id == user_id, Cart.is_active == True))
+            lines = db.session.execute(
+                select(CartItem.product_id, func.count(), func.sum(CartItem.quantity))
+                .join(Cart, Cart.id == CartItem.cart_id)
+                .where(Cart.user_id == user_id, Cart.is_active == True)
+                .group_by(CartItem.product_id)
+            ).all()
+            ok = active == 1 and all(count == 1 and total == expected[user_id, product_id]
+                                     for product_id, count, total in lines)
+            failures += not ok
+            summary = ', '.join(f'produto {p}: {c} linha(s), qtd {t} (esperado {expected[user_id, p]})'
+                                for p, c, t in lines)
+            print(f'{"✅" if ok else "❌"} usuário {user_id}: {active} carrinho(s) ativo(s); {summary}')
+
+    print(f'respostas: {dict(statuses)}')
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latência do catálogo durante uma tempestade de logins
+
+Sobe a aplicação em processo (servidor threaded do Werkzeug) sobre um SQLite
+temporário, mantém N clientes fazendo login sem parar e mede, em paralelo, a
+latência de GET /api/products. Compare o hashing inline com o pool limitado:
+
+    python benchmarks/login_storm.py --hash-workers 0   # inline, sem limite
+    python benchmarks/login_storm.py --hash-workers 2   # pool com 2 workers
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from harness import http, percentile
+from models import db, Category, Product, User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=16, help='clientes fazendo login em paralelo')
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos de medição')
+    parser.add_argument('--hash-workers', type=int, default=2, help='0 executa o hashing inline')
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:600000')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='login-storm-')
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{workdir}/bench.db',
+        'PASSWORD_HASH_METHOD': args.hash_method,
+        'PASSWORD_HASH_WORKERS': args.hash_workers,
+        'PASSWORD_HASH_MAX_PENDING': max(args.hash_workers * 2, 1),
+    })
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Category(name='Vinhos'))
+        db.session.flush()
+        db.session.add_all([Product(name=f'Produto {i}', price=10.0 + i, category_id=1) for i in range(200)])
+        pwhash = generate_password_hash('senha', args.hash_method)
+        db.session.add_all([User(email=f'user{i}@bench', password=pwhash) for i in range(args.logins)])
+        db.session.commit()
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    stop = threading.Event()
+    login_results = []
+    catalog_latencies = []
+
+    def login_loop(i):
+        while not stop.is_set():
+            status, _, _ = http('POST', f'{base_url}/api/login', {'email': f'user{i}@bench', 'password': 'senha'})
+            login_results.append(status)
+
+    def catalog_loop():
+        while not stop.is_set():
+            started = time.perf_counter()
+            http('GET', f'{base_url}/api/products?limit=24')
+            catalog_latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(args.logins)]
+    threads.append(threading.Thread(target=catalog_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    print(f'hash workers: {args.hash_workers or "inline"}  método: {args.hash_method}  logins concorrentes: {args.logins}')
+    print(f'logins: {login_results.count(200)} ok, {login_results.count(503)} rejeitados (503) em {args.duration:.0f}s')
+    print(f'catálogo: {len(catalog_latencies)} requisições  '
+          f'p50={percentile(catalog_latencies, 50):.1f}ms  '
+          f'p95={percentile(catalog_latencies, 95):.1f}ms  '
+          f'p99={percentile(catalog_latencies, 99):.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
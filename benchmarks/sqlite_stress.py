@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Estresse multiprocesso do SQLite: checkouts concorrentes com e sem SQLITE_TUNING
+
+Cada processo escritor repete "adicionar dois itens ao carrinho + checkout"
+com seu próprio usuário, enquanto processos leitores paginam o catálogo e o
+histórico de pedidos, todos sobre o mesmo arquivo. Conta os erros
+"database is locked" e mostra vazão e latência de escritas e leituras em
+cada modo. Sai com código 1 se o modo ajustado tiver qualquer erro de trava:
+
+    python benchmarks/sqlite_stress.py --writers 8 --readers 4 --duration 15
+    python benchmarks/sqlite_stress.py --mode tuned --writers 32
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS)
+
+from sqlalchemy.exc import OperationalError
+
+from harness import percentile, seed
+from app import create_app
+
+MODES = ('stock', 'tuned')
+
+
+def make_app(database_url, tuned):
+    return create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLITE_TUNING': tuned,
+        'CATALOG_CACHE_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'TESTING': False,
+    })
+
+
+def worker(role, index, database_url, tuned, products, users, duration, results):
+    from models import db
+    from services import add_cart_item, place_order, page_products, page_orders
+
+    app = make_app(database_url, tuned)
+    rng = random.Random(index)
+    user_id = index % users + 1
+    latencies, lock_errors, other_errors = [], 0, 0
+
+    with app.app_context():
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if role == 'writer':
+                    add_cart_item(user_id, rng.randint(1, products), 1)
+                    add_cart_item(user_id, rng.randint(1, products), 1)
+                    place_order(user_id, shipping_address='Rua Estresse, 1', payment_method='pix')
+                else:
+                    page_products(rng.randint(1, 8), sort='-price')
+                    page_orders(rng.randint(1, users), with_items=True)
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' in str(e) or 'busy' in str(e):
+                    lock_errors += 1
+                else:
+                    other_errors += 1
+                continue
+            finally:
+                db.session.remove()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    results.put((role, latencies, lock_errors, other_errors))
+
+
+def run_mode(mode, args):
+    database_url = f'sqlite:///{tempfile.mkdtemp(prefix=f"sqlite-stress-{mode}-")}/stress.db'
+    tuned = mode == 'tuned'
+    users = args.writers + args.readers
+    seed(make_app(database_url, tuned), args.products, users, 5, 'pbkdf2:sha256:1000')
+
+    results = multiprocessing.Queue()
+    roles = [('writer', i) for i in range(args.writers)] + [('reader', args.writers + i) for i in range(args.readers)]
+    processes = [
+        multiprocessing.Process(target=worker, args=(role, index, database_url, tuned, args.products,
+                                                     users, args.duration, results))
+        for role, index in roles
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {}
+    for role in ('writer', 'reader'):
+        rows = [row for row in collected if row[0] == role]
+        latencies = [latency for row in rows for latency in row[1]]
+        summary[role] = {
+            'ops': len(latencies),
+            'ops_per_second': round(len(latencies) / args.duration, 1),
+            'lock_errors': sum(row[2] for row in rows),
+            'other_errors': sum(row[3] for row in rows),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--writers', type=int, default=8, help='processos fazendo checkout')
+    parser.add_argument('--readers', type=int, default=4, help='processos lendo catálogo e pedidos')
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--products', type=int, default=2000)
+    args = parser.parse_args()
+
+    failed = False
+    for mode in MODES if args.mode == 'both' else (args.mode,):
+        print(f'🔥 {mode}: {args.writers} escritores, {args.readers} leitores por {args.duration:g}s')
+        summary = run_mode(mode, args)
+        for role, r in summary.items():
+            print(f"   {role:<7} {r['ops_per_second']:>8.1f} ops/s  p50 {r['p50_ms']:>7.1f}  p95 {r['p95_ms']:>7.1f}"
+                  f"  p99 {r['p99_ms']:>7.1f}  travas {r['lock_errors']}  outros erros {r['other_errors']}")
+        if mode == 'tuned' and any(r['lock_errors'] or r['other_errors'] for r in summary.values()):
+            failed = True
+
+    if failed:
+        print('❌ Erros com SQLITE_TUNING ativo')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Verificação de lançamento com estoque pequeno: muitos compradores, poucas unidades
+
+Sobe a aplicação em processo (servidor threaded do Werkzeug) sobre um SQLite
+temporário com um produto de estoque --stock e dispara --buyers clientes ao
+mesmo tempo, cada um adicionando uma unidade ao carrinho e, se conseguir a
+reserva, fazendo o checkout. Ao final roda o varredor e confere que:
+
+- exatamente --stock reservas e --stock pedidos foram aceitos, sem venda
+  além do estoque;
+- os demais receberam 409 ao adicionar ao carrinho, e não no checkout;
+- depois da varredura, Product.stock chegou a zero e não sobrou reserva.
+
+    python benchmarks/stock_drop.py --buyers 200 --stock 3
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, insert, select
+from werkzeug.serving import make_server
+
+from app import create_app
+from harness import http, percentile
+from models import db, Category, Order, Product, StockReservation, User
+from services import available_to_sell, sweep_reservations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--buyers', type=int, default=200)
+    parser.add_argument('--stock', type=int, default=3)
+    parser.add_argument('--database-url', help='padrão: SQLite temporário')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f'sqlite:///{tempfile.mkdtemp(prefix="stock-drop-")}/drop.db'
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLITE_TUNING': True,
+        'METRICS_ENABLED': False,
+        'RESERVATION_SWEEP_INTERVAL': 0,
+    })
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Category(name='Whiskies'))
+        db.session.add(Product(name='Whisky Macallan 18', price=1200.0, stock=args.stock, category_id=1))
+        db.session.execute(insert(User), [{'email': f'drop{i}@bench', 'password': '-'} for i in range(args.buyers)])
+        db.session.commit()
+        tokens = [create_access_token(identity=user_id) for user_id in range(1, args.buyers + 1)]
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    statuses = {'add': Counter(), 'checkout': Counter()}
+    latencies = {'add': [], 'checkout': []}
+    lock = threading.Lock()
+    start = threading.Barrier(args.buyers)
+
+    def buy(token):
+        start.wait()
+        for step, method, path, payload in (
+                ('add', 'POST', '/api/cart/add', {'product_id': 1, 'quantity': 1}),
+                ('checkout', 'POST', '/api/checkout', {'shipping_address': 'Rua Lançamento, 18',
+                                                       'payment_method': 'pix'})):
+            started = time.perf_counter()
+            status, _, _ = http(method, base_url + path, payload, token)
+            with lock:
+                statuses[step][status] += 1
+                latencies[step].append((time.perf_counter() - started) * 1000)
+            if status >= 300:
+                return
+
+    threads = [threading.Thread(target=buy, args=(token,)) for token in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    with app.app_context():
+        orders = db.session.scalar(select(func.count()).select_from(Order))
+        available = available_to_sell([1])[1]
+        stats = sweep_reservations()
+        stock = db.session.get(Product, 1).stock
+        left = db.session.scalar(select(func.count()).select_from(StockReservation))
+
+    for step in ('add', 'checkout'):
+        print(f'   {step:<8} {dict(statuses[step])}  p50 {percentile(latencies[step], 50):.1f}ms'
+              f'  p95 {percentile(latencies[step], 95):.1f}ms')
+    checks = [
+        (f'{statuses["add"][200]} reservas aceitas (estoque {args.stock})', statuses['add'][200] == args.stock),
+        (f'{orders} pedidos criados', orders == args.stock),
+        (f'{statuses["checkout"][409]} checkouts recusados por estoque', statuses['checkout'][409] == 0),
+        (f'disponível para venda antes da varredura: {available}', available == 0),
+        (f'varredura aplicou {stats["applied"]} reservas; estoque final {stock}, {left} reservas restantes',
+         stock == 0 and left == 0),
+    ]
+    for label, ok in checks:
+        print(f'{"✅" if ok else "❌"} {label}')
+    if not all(ok for _, ok in checks):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
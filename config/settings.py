@@ -7,6 +7,85 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
+    
+    # Cache do catálogo (memory:// ou redis://host:porta/db)
+    CATALOG_CACHE_URL = os.environ.get('CATALOG_CACHE_URL') or 'memory://'
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+    CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', 512))
+
+    # Cache das páginas da vitrine (início, produtos e produto), esvaziado junto
+    # com o do catálogo. PAGE_CACHE_MAX_AGE é o s-maxage das respostas para
+    # visitantes sem sessão (CDN/proxy); o navegador sempre revalida pelo ETag
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    PAGE_CACHE_URL = os.environ.get('PAGE_CACHE_URL') or CATALOG_CACHE_URL
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256))
+    PAGE_CACHE_MAX_AGE = int(os.environ.get('PAGE_CACHE_MAX_AGE', 60))
+
+    # Arquivos estáticos (flask build-assets): pasta do build (padrão:
+    # static/dist), variantes comprimidas (br usa o pacote brotli) e o
+    # max-age dos arquivos com hash, servidos com immutable
+    ASSET_BUILD_DIR = os.environ.get('ASSET_BUILD_DIR')
+    ASSET_COMPRESSIONS = [name.strip() for name in (os.environ.get('ASSET_COMPRESSIONS') or 'gzip,br').split(',') if name.strip()]
+    ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 3600))
+    
+    # Hash de senhas (formato do Werkzeug: pbkdf2:sha256:600000, scrypt:32768:8:1...)
+    # Hashes antigos são regravados no próximo login quando o método muda
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR') or 'thread'  # thread ou process
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 = inline
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
+    PASSWORD_HASH_WAIT_TIMEOUT = float(os.environ.get('PASSWORD_HASH_WAIT_TIMEOUT', 2.0))
+
+    # Instrumentação por requisição (Server-Timing e /metrics)
+    # Requisições acima de METRICS_SLOW_REQUEST_MS e comandos SQL repetidos
+    # mais de METRICS_N_PLUS_ONE_THRESHOLD vezes são registrados no log
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 500))
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', 10))
+
+    # SQLite com vários workers: WAL, busy_timeout, mmap e BEGIN IMMEDIATE
+    # nas escritas (ignorado em outros bancos). O busy_timeout deve ficar
+    # abaixo do timeout do gunicorn
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'false').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+
+    # Backups (flask backup-db): compressão gzip, zstd ou none; retenção pelos
+    # BACKUP_KEEP mais recentes e por idade (0 = sem limite de idade)
+    BACKUP_DIR = os.environ.get('BACKUP_DIR') or 'backups'
+    BACKUP_COMPRESSION = os.environ.get('BACKUP_COMPRESSION') or 'gzip'
+    BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 14))
+    BACKUP_MAX_AGE_DAYS = int(os.environ.get('BACKUP_MAX_AGE_DAYS', 30))
+    BACKUP_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP', 1024))  # SQLite
+    BACKUP_STEP_SLEEP_MS = int(os.environ.get('BACKUP_STEP_SLEEP_MS', 50))
+
+    # Reservas de estoque: adicionar ao carrinho segura a quantidade por
+    # RESERVATION_TTL_SECONDS. Um varredor por processo servidor (iniciado na
+    # primeira requisição) libera as vencidas e aplica as convertidas no
+    # checkout ao estoque. 0 = desligado: rode flask sweep-reservations pelo
+    # cron, senão Product.stock não baixa
+    RESERVATION_TTL_SECONDS = int(os.environ.get('RESERVATION_TTL_SECONDS', 900))
+    RESERVATION_SWEEP_INTERVAL = int(os.environ.get('RESERVATION_SWEEP_INTERVAL', 60))  # segundos
+    RESERVATION_SWEEP_BATCH = int(os.environ.get('RESERVATION_SWEEP_BATCH', 500))
+
+    # Produtos relacionados: quantos vizinhos flask build-recommendations guarda
+    # por produto (também o limite de /api/products/<id>/related)
+    RECOMMENDATIONS_TOP_K = int(os.environ.get('RECOMMENDATIONS_TOP_K', 12))
+
+    # Réplicas de leitura (URLs separadas por vírgula): catálogo e histórico
+    # de pedidos leem de uma réplica. Depois de alterar o carrinho ou fazer um
+    # pedido, o usuário lê do primário por REPLICA_STICKY_SECONDS (deve cobrir
+    # o atraso de replicação). Use redis:// para valer entre workers
+    DATABASE_REPLICA_URLS = [url.strip() for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    REPLICA_STICKY_URL = os.environ.get('REPLICA_STICKY_URL') or CATALOG_CACHE_URL
+
+    # Ponto de entrada ASGI (asgi.py): vazio = DATABASE_URL com o driver
+    # assíncrono equivalente (aiosqlite ou asyncpg)
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
 
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
@@ -17,12 +96,23 @@ class ProductionConfig(Config):
     """Configuração para produção"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///ecommerce.db'
+    
+    # Pool de conexões de cada processo; o gunicorn.conf.py define
+    # DB_POOL_SIZE/DB_MAX_OVERFLOW a partir de threads e workers
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # segundos
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
 
 class TestingConfig(Config):
     """Configuração para testes"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
 
 # Configurações disponíveis
 config = {
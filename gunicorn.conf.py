@@ -0,0 +1,104 @@
+"""
+Perfil de produção do gunicorn (lido automaticamente por `gunicorn app:app`)
+
+    FLASK_ENV=production gunicorn app:app
+    GUNICORN_WORKERS=4 GUNICORN_THREADS=8 DB_MAX_CONNECTIONS=100 gunicorn app:app
+
+Workers e threads derivam do número de núcleos. Cada worker recebe um pool
+com uma conexão por thread; com DB_MAX_CONNECTIONS o total de conexões de
+todos os workers fica dentro desse limite. A aplicação é carregada uma vez
+no master (preload_app) e cada worker se aquece antes de aceitar conexões.
+"""
+
+import multiprocessing
+import os
+
+cores = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('GUNICORN_WORKERS') or cores * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers periodically; the jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 5000)
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL') or 'info'
+
+
+def pool_sizing(workers, threads, max_connections=0):
+    """(pool_size, max_overflow) de cada worker"""
+    if not max_connections:
+        return threads, 2
+    per_worker = max(1, max_connections // workers)
+    pool_size = min(threads, per_worker)
+    return pool_size, per_worker - pool_size
+
+
+# Read by ProductionConfig when the app is loaded, i.e. after this file;
+# values set explicitly in the environment win
+_pool_size, _max_overflow = pool_sizing(workers, threads, int(os.environ.get('DB_MAX_CONNECTIONS') or 0))
+os.environ.setdefault('DB_POOL_SIZE', str(_pool_size))
+os.environ.setdefault('DB_MAX_OVERFLOW', str(_max_overflow))
+
+
+def _flask_app(wsgi):
+    # The hooks only apply to app.py; asgi.py under UvicornWorker also reads this file
+    from flask import Flask
+
+    return wsgi if isinstance(wsgi, Flask) else None
+
+
+def _dispose_engines(app, close):
+    from models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+
+def when_ready(server):
+    # Compiling templates and filling the catalog cache in the master means
+    # every forked worker starts with them already in memory
+    app = _flask_app(server.app.wsgi()) if server.cfg.preload_app else None
+    if app is None:
+        return
+    from services import warm_up
+
+    stats = warm_up(app)
+    _dispose_engines(app, close=True)
+    server.log.info('Master aquecido: %(templates)d templates, %(categories)d categorias em %(seconds).3fs', stats)
+    server.log.info('Pool por worker: pool_size=%s max_overflow=%s (%d workers x %d threads)',
+                    os.environ['DB_POOL_SIZE'], os.environ['DB_MAX_OVERFLOW'], workers, threads)
+
+
+def post_fork(server, worker):
+    # Connections inherited from the master share sockets with it and with
+    # every sibling; drop them without closing so each worker opens its own
+    app = _flask_app(server.app.wsgi()) if server.cfg.preload_app else None
+    if app is not None:
+        _dispose_engines(app, close=False)
+
+
+def post_worker_init(worker):
+    # Runs after the app is loaded and before the worker starts accepting:
+    # opens this worker's first connection and refills expired cache entries
+    app = _flask_app(worker.wsgi)
+    if app is None:
+        return
+    from services import warm_up
+
+    stats = warm_up(app)
+    worker.log.info('Worker %s aquecido em %.3fs', worker.pid, stats['seconds'])
+
+    from services import reservation_sweeper
+
+    # Start before the first request rather than on it
+    reservation_sweeper.start(app)
@@ -10,6 +10,7 @@ from flask.cli import FlaskGroup
 from flask_migrate import init, migrate, upgrade, downgrade, history, show
 from app import create_app
 from models import db, User, Product, Category, Order, OrderItem, Cart, CartItem
+from services import import_catalog, SEED_CATALOG, backup_database, BackupError
 
 def create_app_for_cli():
     """Cria instância da app para CLI"""
@@ -52,40 +53,9 @@ def seed_db():
         print("⚠️  Dados já existem no banco. Pulando seed...")
         return
     
-    # Cria categorias
-    categories = [
-        Category(name='Vinhos'),
-        Category(name='Whiskies'),
-        Category(name='Cervejas')
-    ]
+    stats = import_catalog(SEED_CATALOG)
     
-    for cat in categories:
-        db.session.add(cat)
-    
-    db.session.commit()
-    print("✅ Categorias criadas!")
-    
-    # Cria produtos
-    products = [
-        Product(name='Vinho Tinto Premium', description='Vinho tinto encorpado com notas de frutas vermelhas', price=89.90, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-        Product(name='Whisky Single Malt', description='Whisky escocês envelhecido por 12 anos', price=250.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-        Product(name='Cerveja Artesanal IPA', description='India Pale Ale com lúpulos aromáticos', price=25.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-        Product(name='Vinho Branco Seco', description='Vinho branco refrescante e mineral', price=65.90, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-        Product(name='Bourbon Premium', description='Bourbon americano envelhecido em carvalho', price=180.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-        Product(name='Cerveja Pilsner', description='Cerveja lager clara e refrescante', price=18.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-        Product(name='Vinho Rosé', description='Vinho rosé delicado e frutado', price=45.90, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-        Product(name='Whisky Japonês', description='Whisky japonês suave e complexo', price=320.00, category_id=2, image_url='https://images.unsplash.com/photo-1569529465841-dfecdab7503b?w=300&h=300&fit=crop'),
-        Product(name='Cerveja Stout', description='Cerveja escura e cremosa', price=22.90, category_id=3, image_url='https://images.unsplash.com/photo-1608270586620-248524c67de9?w=300&h=300&fit=crop'),
-        Product(name='Champagne Premium', description='Champagne francês de alta qualidade', price=450.00, category_id=1, image_url='https://images.unsplash.com/photo-1510812431401-41d2bd2722f3?w=300&h=300&fit=crop'),
-    ]
-    
-    for prod in products:
-        db.session.add(prod)
-    
-    db.session.commit()
-    print("✅ Produtos criados!")
-    
-    print(f"🎉 Banco populado com {len(categories)} categorias e {len(products)} produtos!")
+    print(f"🎉 Banco populado com {stats['categories']} categorias e {stats['products']} produtos!")
 
 @cli.command()
 def reset_db():
@@ -132,22 +102,16 @@ def show_tables():
 
 @cli.command()
 def backup_db():
-    """Cria backup do banco de dados"""
-    from datetime import datetime
-    import shutil
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = f"backup_ecommerce_{timestamp}.db"
-    
+    """Cria backup online do banco de dados"""
     try:
-        shutil.copy('instance/ecommerce.db', f'backups/{backup_name}')
-        print(f"✅ Backup criado: backups/{backup_name}")
-    except FileNotFoundError:
-        os.makedirs('backups', exist_ok=True)
-        shutil.copy('instance/ecommerce.db', f'backups/{backup_name}')
-        print(f"✅ Backup criado: backups/{backup_name}")
-    except Exception as e:
+        stats = backup_database()
+    except (BackupError, RuntimeError) as e:
         print(f"❌ Erro ao criar backup: {e}")
+        return
+    
+    print(f"✅ Backup criado: {stats['path']} (integridade {stats['integrity']})")
+    for path in stats['removed']:
+        print(f"🧹 Removido pela retenção: {path}")
 
 @cli.command()
 def create_migration():
@@ -51,6 +51,23 @@ def get_metadata():
     return target_db.metadata
 
 
+# Full-text search objects are created by DDL events in models.py, outside
+# the metadata; autogenerate must not propose dropping them
+FTS_TABLE = 'product_fts'
+FTS_COLUMNS = {('product', 'search_vector')}
+FTS_INDEXES = {'ix_product_search_vector'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table':
+        return name != FTS_TABLE and not name.startswith(FTS_TABLE + '_')
+    if type_ == 'column':
+        return (object.table.name, name) not in FTS_COLUMNS
+    if type_ == 'index':
+        return name not in FTS_INDEXES
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +82,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +111,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
@@ -0,0 +1,46 @@
+"""Make cart lines unique per product
+
+Revision ID: a4d8e61b9f37
+Revises: f1c09d4e7a26
+Create Date: 2026-10-17 17:26:44.109383
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d8e61b9f37'
+down_revision = 'f1c09d4e7a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold duplicate lines into the oldest one, summing their quantities
+    cart_item = sa.table('cart_item', sa.column('id'), sa.column('cart_id'),
+                         sa.column('product_id'), sa.column('quantity'))
+    duplicate = cart_item.alias('duplicate')
+    keep = sa.select(sa.func.min(cart_item.c.id)).group_by(cart_item.c.cart_id, cart_item.c.product_id)
+    folded = (
+        sa.select(sa.func.sum(duplicate.c.quantity))
+        .where(duplicate.c.cart_id == cart_item.c.cart_id, duplicate.c.product_id == cart_item.c.product_id)
+        .scalar_subquery()
+    )
+    has_duplicates = (
+        sa.select(sa.func.min(cart_item.c.id))
+        .group_by(cart_item.c.cart_id, cart_item.c.product_id)
+        .having(sa.func.count() > 1)
+    )
+    op.execute(cart_item.update().where(cart_item.c.id.in_(has_duplicates)).values(quantity=folded))
+    op.execute(cart_item.delete().where(cart_item.c.id.not_in(keep)))
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_cart_item_cart_id_product_id')
+        batch_op.create_index('uq_cart_item_cart_id_product_id', ['cart_id', 'product_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.drop_index('uq_cart_item_cart_id_product_id')
+        batch_op.create_index('ix_cart_item_cart_id_product_id', ['cart_id', 'product_id'], unique=False)
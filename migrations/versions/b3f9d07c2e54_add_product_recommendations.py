@@ -0,0 +1,35 @@
+"""Add product recommendations
+
+Revision ID: b3f9d07c2e54
+Revises: c8e2b5f03a71
+Create Date: 2026-10-17 23:58:31.204617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f9d07c2e54'
+down_revision = 'c8e2b5f03a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_recommendation',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('related_product_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['related_product_id'], ['product.id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'rank')
+    )
+
+    # Empty until the first `flask build-recommendations`; product pages fall
+    # back to the same category meanwhile
+
+
+def downgrade():
+    op.drop_table('product_recommendation')
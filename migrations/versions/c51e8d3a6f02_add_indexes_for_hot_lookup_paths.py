@@ -0,0 +1,72 @@
+"""Add indexes for hot lookup paths
+
+Revision ID: c51e8d3a6f02
+Revises: a7c4e2f19b30
+Create Date: 2026-10-17 10:03:18.227541
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51e8d3a6f02'
+down_revision = 'a7c4e2f19b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep only the oldest active cart per user (the one the app has been
+    # serving) so the unique partial index can be created
+    cart = sa.table('cart', sa.column('id'), sa.column('user_id'), sa.column('is_active'))
+    keep = sa.select(sa.func.min(cart.c.id)).where(cart.c.is_active == sa.true()).group_by(cart.c.user_id)
+    op.execute(
+        cart.update()
+        .where(cart.c.is_active == sa.true(), cart.c.id.not_in(keep))
+        .values(is_active=sa.false())
+    )
+
+    with op.batch_alter_table('cart', schema=None) as batch_op:
+        batch_op.create_index('ix_cart_user_id_is_active', ['user_id', 'is_active'], unique=False)
+        batch_op.create_index('uq_cart_user_id_active', ['user_id'], unique=True,
+                              sqlite_where=sa.text('is_active = 1'),
+                              postgresql_where=sa.text('is_active'))
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.create_index('ix_cart_item_cart_id_product_id', ['cart_id', 'product_id'], unique=False)
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.create_index('ix_order_item_order_id', ['order_id'], unique=False)
+        batch_op.create_index('ix_order_item_product_id', ['product_id'], unique=False)
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('ix_product_category_id', ['category_id'], unique=False)
+        batch_op.create_index('ix_product_price_id', ['price', 'id'], unique=False)
+        batch_op.create_index('ix_product_name_id', ['name', 'id'], unique=False)
+        batch_op.create_index('ix_product_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_created_at_id')
+        batch_op.drop_index('ix_product_name_id')
+        batch_op.drop_index('ix_product_price_id')
+        batch_op.drop_index('ix_product_category_id')
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_item_product_id')
+        batch_op.drop_index('ix_order_item_order_id')
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_user_id_created_at')
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_cart_item_cart_id_product_id')
+
+    with op.batch_alter_table('cart', schema=None) as batch_op:
+        batch_op.drop_index('uq_cart_user_id_active')
+        batch_op.drop_index('ix_cart_user_id_is_active')
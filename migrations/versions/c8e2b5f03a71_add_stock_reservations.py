@@ -0,0 +1,49 @@
+"""Add stock reservations for cart holds
+
+Revision ID: c8e2b5f03a71
+Revises: a4d8e61b9f37
+Create Date: 2026-10-17 23:42:10.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2b5f03a71'
+down_revision = 'a4d8e61b9f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_reservation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cart_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['cart_id'], ['cart.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stock_reservation', schema=None) as batch_op:
+        batch_op.create_index('uq_stock_reservation_cart_id_product_id', ['cart_id', 'product_id'], unique=True)
+        batch_op.create_index('ix_stock_reservation_product_id_expires_at',
+                              ['product_id', 'expires_at', 'quantity'], unique=False)
+        batch_op.create_index('ix_stock_reservation_expires_at', ['expires_at'], unique=False)
+
+    # Carts that already exist get their holds on the next cart change or at
+    # checkout, which re-reserves lines without a live hold
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservation', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_reservation_expires_at')
+        batch_op.drop_index('ix_stock_reservation_product_id_expires_at')
+        batch_op.drop_index('uq_stock_reservation_cart_id_product_id')
+
+    op.drop_table('stock_reservation')
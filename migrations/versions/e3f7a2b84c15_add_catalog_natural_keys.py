@@ -0,0 +1,50 @@
+"""Add natural keys for catalog imports
+
+Revision ID: e3f7a2b84c15
+Revises: c51e8d3a6f02
+Create Date: 2026-10-17 13:41:52.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f7a2b84c15'
+down_revision = 'c51e8d3a6f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Merge duplicate category names into the oldest one so the unique
+    # index can be created
+    category = sa.table('category', sa.column('id'), sa.column('name'))
+    product = sa.table('product', sa.column('id'), sa.column('category_id'))
+    keep = sa.select(sa.func.min(category.c.id)).group_by(category.c.name)
+    duplicate = category.alias('duplicate')
+    oldest = (
+        sa.select(sa.func.min(category.c.id))
+        .where(category.c.name == duplicate.c.name, duplicate.c.id == product.c.category_id)
+        .scalar_subquery()
+    )
+    op.execute(product.update().where(product.c.category_id.not_in(keep)).values(category_id=oldest))
+    op.execute(category.delete().where(category.c.id.not_in(keep)))
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.create_index('uq_category_name', ['name'], unique=True)
+
+    # Plain ALTER TABLE ADD COLUMN: a batch recreate of product would drop
+    # the full-text search triggers
+    op.add_column('product', sa.Column('sku', sa.String(length=64), nullable=True))
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('uq_product_sku', ['sku'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('uq_product_sku')
+    op.drop_column('product', 'sku')
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.drop_index('uq_category_name')
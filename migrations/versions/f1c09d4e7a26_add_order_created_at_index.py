@@ -0,0 +1,26 @@
+"""Add order created_at index for exports
+
+Revision ID: f1c09d4e7a26
+Revises: e3f7a2b84c15
+Create Date: 2026-10-17 15:12:06.871240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c09d4e7a26'
+down_revision = 'e3f7a2b84c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_created_at')
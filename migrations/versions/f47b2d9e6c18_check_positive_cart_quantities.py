@@ -0,0 +1,36 @@
+"""Check positive cart and reservation quantities
+
+Revision ID: f47b2d9e6c18
+Revises: e6a1c4b8d290
+Create Date: 2026-10-18 10:12:44.518730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f47b2d9e6c18'
+down_revision = 'e6a1c4b8d290'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lines and holds written before quantities were validated
+    op.execute('DELETE FROM stock_reservation WHERE quantity <= 0')
+    op.execute('DELETE FROM cart_item WHERE quantity <= 0')
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.create_check_constraint('ck_cart_item_quantity_positive', 'quantity > 0')
+
+    with op.batch_alter_table('stock_reservation', schema=None) as batch_op:
+        batch_op.create_check_constraint('ck_stock_reservation_quantity_positive', 'quantity > 0')
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservation', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_stock_reservation_quantity_positive', type_='check')
+
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_cart_item_quantity_positive', type_='check')
@@ -1,8 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import DDL, event, text
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import Select
 from datetime import datetime
 
+
+class RoutingSession(Session):
+    """Sessão que lê da réplica em session.info['replica'] (ver services/replicas.py)
+
+    Flushes, INSERT/UPDATE/DELETE e SELECT ... FOR UPDATE vão sempre para o
+    primário; depois da primeira escrita a sessão inteira fica no primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        if self._flushing or isinstance(clause, UpdateBase) or (
+                isinstance(clause, Select) and clause._for_update_arg is not None):
+            self.info['wrote'] = True
+        replica = self.info.get('replica')
+        if replica is not None and not self.info.get('wrote'):
+            return replica
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
 # Criar instância do SQLAlchemy que será importada pelo app
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -21,9 +45,15 @@ class Category(db.Model):
     name = db.Column(db.String(100), nullable=False)
     
     products = db.relationship('Product', backref='category', lazy=True)
+    
+    __table_args__ = (
+        # Natural key for catalog imports
+        db.Index('uq_category_name', 'name', unique=True),
+    )
 
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(64))
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Float, nullable=False)
@@ -34,6 +64,16 @@ class Product(db.Model):
     
     order_items = db.relationship('OrderItem', backref='product', lazy=True)
     cart_items = db.relationship('CartItem', backref='product', lazy=True)
+    
+    __table_args__ = (
+        db.Index('ix_product_category_id', 'category_id'),
+        # Keyset pagination orders by (sort_key, id)
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_name_id', 'name', 'id'),
+        db.Index('ix_product_created_at_id', 'created_at', 'id'),
+        # Natural key for catalog imports (NULL for products created by hand)
+        db.Index('uq_product_sku', 'sku', unique=True),
+    )
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -43,8 +83,16 @@ class Order(db.Model):
     payment_method = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(50), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set once the order is counted in the sales rollups (services/rollups.py)
+    rolled_up_at = db.Column(db.DateTime)
     
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_order_user_id_created_at', 'user_id', 'created_at'),
+        # Date-range exports and reports across all users
+        db.Index('ix_order_created_at', 'created_at'),
+    )
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -52,6 +100,11 @@ class OrderItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_order_item_order_id', 'order_id'),
+        db.Index('ix_order_item_product_id', 'product_id'),
+    )
 
 class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -60,10 +113,115 @@ class Cart(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     items = db.relationship('CartItem', backref='cart', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_cart_user_id_is_active', 'user_id', 'is_active'),
+        # A user has at most one active cart
+        db.Index('uq_cart_user_id_active', 'user_id', unique=True,
+                 sqlite_where=text('is_active = 1'),
+                 postgresql_where=text('is_active')),
+    )
 
 class CartItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('cart.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
-    added_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    added_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # One line per product: cart mutations upsert on this key
+        db.Index('uq_cart_item_cart_id_product_id', 'cart_id', 'product_id', unique=True),
+        db.CheckConstraint('quantity > 0', name='ck_cart_item_quantity_positive'),
+    )
+
+class StockReservation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    cart_id = db.Column(db.Integer, db.ForeignKey('cart.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    # NULL once checkout converts the hold; it then counts until applied to Product.stock
+    expires_at = db.Column(db.DateTime)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # One hold per cart line: cart mutations upsert on this key
+        db.Index('uq_stock_reservation_cart_id_product_id', 'cart_id', 'product_id', unique=True),
+        # Available-to-sell sums the holds of a product from this index alone
+        db.Index('ix_stock_reservation_product_id_expires_at', 'product_id', 'expires_at', 'quantity'),
+        # Sweeper: expired holds by date, converted ones by IS NULL
+        db.Index('ix_stock_reservation_expires_at', 'expires_at'),
+        # A negative hold would add to available-to-sell for everyone else
+        db.CheckConstraint('quantity > 0', name='ck_stock_reservation_quantity_positive'),
+    )
+
+class ProductRecommendation(db.Model):
+    # Top-K co-purchase neighbours per product, rebuilt by `flask build-recommendations`
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    rank = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    related_product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+class SalesDaily(db.Model):
+    # Sales rollups per UTC day, maintained by services/rollups.py
+    day = db.Column(db.Date, primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+
+class SalesDailyProduct(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True, autoincrement=False)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+
+class SalesDailyCategory(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), primary_key=True, autoincrement=False)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+
+class RollupWatermark(db.Model):
+    # Orders up to last_order_id were checked by the catch-up job
+    name = db.Column(db.String(50), primary_key=True)
+    last_order_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Índice de busca textual de produtos. No SQLite é uma tabela virtual FTS5
+# mantida por triggers; no PostgreSQL, uma coluna tsvector gerada com índice
+# GIN. A migração a7c4e2f19b30 cria a mesma estrutura em bancos existentes.
+PRODUCT_SEARCH_DDL = {
+    'sqlite': [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+            name, description, content='product', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2')""",
+        """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+            INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END""",
+    ],
+    'postgresql': [
+        """ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('portuguese', coalesce(description, '')), 'B')
+            ) STORED""",
+        """CREATE INDEX IF NOT EXISTS ix_product_search_vector ON product USING gin (search_vector)""",
+    ],
+}
+
+for _dialect, _statements in PRODUCT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Product.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
+event.listen(Product.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS product_fts').execute_if(dialect='sqlite'))
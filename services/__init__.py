@@ -0,0 +1,28 @@
+from .cache import catalog_cache, mark_catalog_dirty
+from .page_cache import page_cache, render_blocks
+from .cart import (
+    load_active_cart, add_cart_item, set_cart_item_quantity, remove_cart_item,
+    apply_cart_operations, serialize_cart, CartOperationError
+)
+from .catalog import (
+    list_categories, get_category, get_category_by_name, page_products, featured_products, InvalidQueryError
+)
+from .checkout import place_order, CheckoutError, EmptyCartError, InvalidCartLineError, OutOfStockError
+from .search import search_products
+from .identity import remember_identity, load_current_user, current_user_proxy
+from .passwords import password_hasher, PasswordHasherBusy
+from .metrics import request_metrics
+from .catalog_import import import_catalog, CatalogImportError, SEED_CATALOG
+from .exports import export_orders, parse_export_filters, EXPORT_FORMATS
+from .backups import backup_database, apply_retention, BackupError, BACKUP_COMPRESSIONS
+from .orders import page_orders, order_summaries, serialize_order
+from .async_db import async_db, async_database_url
+from .warmup import warm_up
+from .sqlite_tuning import sqlite_tuning
+from .replicas import replica_routing, replica_reads, CATALOG_PIN
+from .reservations import (
+    available_to_sell, sweep_reservations, reservation_sweeper, InsufficientStockError
+)
+from .recommendations import build_recommendations, related_products
+from .rollups import catch_up_rollups, rebuild_rollups, sales_analytics
+from .assets import asset_pipeline, asset_url, build_assets, ASSET_COMPRESSIONS
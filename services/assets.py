@@ -0,0 +1,176 @@
+"""
+Arquivos estáticos com hash no nome e pré-comprimidos
+
+`flask build-assets` copia os arquivos de static/ para ASSET_BUILD_DIR com o
+hash do conteúdo no nome (css/style.3f2a9c81d0e4.css), grava ao lado as
+versões .gz e .br dos arquivos de texto e um manifest.json com o nome
+original de cada um. Nos templates, asset_url('css/style.css') aponta para a
+versão com hash, servida em /assets/ com a variante comprimida que o
+Accept-Encoding aceitar e Cache-Control immutable por um ano: como o nome
+muda com o conteúdo, visitas seguintes não baixam nem revalidam nada.
+
+Sem build (desenvolvimento), asset_url cai no url_for('static').
+Builds anteriores ficam na pasta, para páginas já em cache que ainda
+apontem para eles.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import abort, current_app, request, send_file, url_for
+from werkzeug.security import safe_join
+
+ASSET_COMPRESSIONS = ('gzip', 'br')
+MANIFEST_NAME = 'manifest.json'
+# Only text formats shrink enough to be worth a compressed sibling
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico'}
+# Preferred first when the client accepts both
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _compress(data, compression):
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    try:
+        import brotli
+    except ImportError:
+        raise RuntimeError('A compressão br requer o pacote "brotli" (pip install brotli) '
+                           'ou ASSET_COMPRESSIONS=gzip')
+    return brotli.compress(data, quality=11)
+
+
+def _write(path, data):
+    # Atomic, so a running server never serves a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.partial'
+    with open(partial, 'wb') as f:
+        f.write(data)
+    os.replace(partial, path)
+
+
+def build_assets(source_dir, output_dir, compressions=ASSET_COMPRESSIONS):
+    """Gera os arquivos com hash, as variantes comprimidas e o manifest
+
+    Retorna um dict com o manifest e as contagens de arquivos e bytes.
+    """
+    for compression in compressions:
+        if compression not in ASSET_COMPRESSIONS:
+            raise ValueError(f'Compressão desconhecida: {compression}')
+    source_dir, output_dir = os.path.abspath(source_dir), os.path.abspath(output_dir)
+    manifest = {}
+    stats = {'files': 0, 'compressed': 0, 'bytes': 0, 'compressed_bytes': {name: 0 for name in compressions}}
+
+    for directory, subdirectories, filenames in os.walk(source_dir):
+        # Never fingerprint a previous build
+        subdirectories[:] = sorted(name for name in subdirectories
+                                   if os.path.join(directory, name) != output_dir and not name.startswith('.'))
+        for filename in sorted(filenames):
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, source_dir).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            stem, extension = os.path.splitext(name)
+            hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+            target = os.path.join(output_dir, hashed)
+            _write(target, data)
+            manifest[name] = hashed
+            stats['files'] += 1
+            stats['bytes'] += len(data)
+
+            if extension.lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            for compression in compressions:
+                compressed = _compress(data, compression)
+                if len(compressed) < len(data):
+                    _write(target + dict(ENCODING_SUFFIXES)[compression], compressed)
+                    stats['compressed_bytes'][compression] += len(compressed)
+            stats['compressed'] += 1
+
+    _write(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    stats['manifest'] = manifest
+    return stats
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f), os.path.getmtime(path)
+    except FileNotFoundError:
+        return {}, None
+
+
+class AssetPipeline:
+    """asset_url nos templates e a rota /assets/ com cache immutable"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        build_dir = app.config.get('ASSET_BUILD_DIR') or os.path.join(app.static_folder, 'dist')
+        manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+        manifest, mtime = _load_manifest(manifest_path)
+        app.extensions['asset_pipeline'] = {
+            'build_dir': build_dir,
+            'manifest_path': manifest_path,
+            'manifest': manifest,
+            'mtime': mtime,
+            'max_age': app.config.get('ASSET_MAX_AGE', 365 * 24 * 3600),
+        }
+        app.add_template_global(asset_url)
+        app.add_url_rule('/assets/<path:filename>', 'assets', _send_asset)
+
+    @property
+    def _state(self):
+        return current_app.extensions['asset_pipeline']
+
+    def manifest(self):
+        state = self._state
+        # The reloader only watches Python files; pick up `flask build-assets` while debugging
+        if current_app.debug:
+            try:
+                mtime = os.path.getmtime(state['manifest_path'])
+            except OSError:
+                mtime = None
+            if mtime != state['mtime']:
+                state['manifest'], state['mtime'] = _load_manifest(state['manifest_path'])
+        return state['manifest']
+
+
+asset_pipeline = AssetPipeline()
+
+
+def asset_url(filename, **values):
+    """Como url_for('static', filename=...), mas aponta para a versão com hash do build"""
+    hashed = asset_pipeline.manifest().get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename, **values)
+    return url_for('assets', filename=hashed, **values)
+
+
+def _send_asset(filename):
+    state = current_app.extensions['asset_pipeline']
+    path = safe_join(state['build_dir'], filename)
+    if path is None or filename == MANIFEST_NAME or not os.path.isfile(path):
+        abort(404)
+
+    encoding = None
+    for name, suffix in ENCODING_SUFFIXES:
+        if request.accept_encodings[name] and os.path.isfile(path + suffix):
+            encoding, path = name, path + suffix
+            break
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(path, mimetype=mimetype, max_age=state['max_age'], conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,68 @@
+"""
+Engine e sessões assíncronas para o ponto de entrada ASGI (asgi.py)
+
+Os serviços continuam escritos de forma síncrona e recebem a sessão em
+session. async_db.run executa uma função síncrona com AsyncSession.run_sync:
+a cada ida ao banco o SQLAlchemy suspende a corrotina (via greenlet) e o
+event loop segue atendendo outras requisições, em vez de o worker inteiro
+ficar parado esperando o PostgreSQL.
+"""
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import db
+from .sqlite_tuning import sqlite_tuning
+
+# Sync dialect -> async driver
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(url):
+    """Troca o driver síncrono da URL pelo equivalente assíncrono"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'Nenhum driver assíncrono configurado para o banco {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncDatabase:
+    """Engine assíncrona ligada à mesma base e às mesmas opções do Flask-SQLAlchemy"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get('ASYNC_DATABASE_URL')
+        if not url:
+            # Flask-SQLAlchemy resolves relative SQLite paths against the
+            # instance folder; reuse its URL so both entry points share a file
+            with app.app_context():
+                url = async_database_url(db.engine.url)
+        engine = create_async_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        sqlite_tuning.register(app, engine.sync_engine)
+        app.extensions['async_db'] = {
+            'engine': engine,
+            'sessionmaker': async_sessionmaker(engine, expire_on_commit=False),
+        }
+
+    async def run(self, app, fn):
+        """Executa fn(session) com uma sessão nova, dentro do contexto da aplicação
+
+        fn recebe a sessão síncrona da AsyncSession e deve devolver dados já
+        serializados: objetos ORM não podem carregar atributos fora dela.
+        """
+        with app.app_context():
+            async with app.extensions['async_db']['sessionmaker']() as session:
+                return await session.run_sync(fn)
+
+    async def dispose(self, app):
+        await app.extensions['async_db']['engine'].dispose()
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,268 @@
+"""
+Backups online do banco, comprimidos e com política de retenção
+
+SQLite: a API de backup copia o banco em passos de BACKUP_PAGES_PER_STEP
+páginas, liberando a trava entre os passos, de modo que os escritores não
+ficam parados durante a cópia. A cópia, um arquivo temporário na pasta dos
+backups, é conferida com PRAGMA integrity_check e então comprimida em
+streaming para o arquivo final (ou apenas renomeada, sem compressão): o
+pico de disco é o tamanho do banco mais o do arquivo comprimido.
+
+PostgreSQL: dump lógico das tabelas dos modelos no formato COPY do psql,
+lido com cursor do lado do servidor dentro de uma transação REPEATABLE READ
+(um retrato consistente, com memória constante). Restauração:
+flask db upgrade e depois psql -f no arquivo descomprimido.
+"""
+
+import gzip
+import io
+import os
+import re
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from models import db
+
+BACKUP_COMPRESSIONS = ('gzip', 'zstd', 'none')
+BACKUP_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+BACKUP_NAME = re.compile(r'^backup_(.+)_(\d{8}_\d{6})\.(db|sql)(\.gz|\.zst)?$')
+COPY_CHUNK_BYTES = 1024 * 1024
+DUMP_YIELD_PER = 5000
+# A source modified by other connections makes the backup start over; past
+# this many restarts, finish with a single step instead
+MAX_BACKUP_RESTARTS = 5
+
+
+class BackupError(Exception):
+    """O backup não pôde ser criado ou não passou na verificação"""
+
+
+def _open_compressed(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError('A compressão zstd requer o pacote "zstandard" (pip install zstandard)')
+        return zstandard.ZstdCompressor(level=6).stream_writer(open(path, 'wb'), closefd=True)
+    return open(path, 'wb')
+
+
+def _open_decompressed(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        import zstandard
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    return open(path, 'rb')
+
+
+def _sqlite_backup(database, output, compression, pages_per_step, step_sleep):
+    if not database or database == ':memory:' or not os.path.exists(database):
+        raise BackupError(f'Banco SQLite não encontrado: {database or ":memory:"}')
+
+    partial = os.path.join(os.path.dirname(output), f'.{os.path.basename(output)}.partial')
+    stats = {'steps': 0, 'restarts': 0, 'single_step': False}
+    remaining_before = None
+
+    def progress(status, remaining, total):
+        nonlocal remaining_before
+        stats['steps'] += 1
+        if remaining_before is not None and remaining > remaining_before:
+            stats['restarts'] += 1
+            if stats['restarts'] > MAX_BACKUP_RESTARTS:
+                raise BackupError('too many restarts')
+        remaining_before = remaining
+
+    try:
+        source = sqlite3.connect(database)
+        target = sqlite3.connect(partial)
+        try:
+            try:
+                source.backup(target, pages=pages_per_step, progress=progress, sleep=step_sleep)
+            except BackupError:
+                # Writes keep invalidating the copy; a single step only holds
+                # a read lock, which in WAL mode does not block writers either
+                source.backup(target, pages=-1)
+                stats['single_step'] = True
+
+            result = [row[0] for row in target.execute('PRAGMA integrity_check')]
+            if result != ['ok']:
+                raise BackupError(f'integrity_check falhou: {"; ".join(result[:5])}')
+            stats['pages'] = target.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+
+        if compression == 'none':
+            # The verified copy is the backup; copying it would double the disk use
+            os.replace(partial, output)
+        else:
+            with open(partial, 'rb') as src, _open_compressed(output, compression) as dst:
+                while True:
+                    chunk = src.read(COPY_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    stats['integrity'] = 'ok'
+    return stats
+
+
+def _copy_value(value):
+    # PostgreSQL COPY text format
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _postgres_dump(output, compression):
+    tables = db.metadata.sorted_tables
+    counts = {}
+
+    with db.engine.connect() as conn, _open_compressed(output, compression) as out:
+        conn.execution_options(isolation_level='REPEATABLE READ')
+        with conn.begin():
+            conn.exec_driver_sql('SET TRANSACTION READ ONLY')
+            out.write(f'-- Backup lógico {datetime.now().isoformat(timespec="seconds")}\n'
+                      f'-- Restauração: flask db upgrade && psql -f <arquivo>\n'
+                      f'BEGIN;\n'.encode())
+            for table in tables:
+                columns = [column.name for column in table.columns]
+                quoted = ', '.join(f'"{name}"' for name in columns)
+                out.write(f'\nCOPY "{table.name}" ({quoted}) FROM stdin;\n'.encode())
+
+                stmt = select(table).order_by(*table.primary_key.columns)
+                result = conn.execute(stmt, execution_options={'yield_per': DUMP_YIELD_PER})
+                rows = 0
+                buffer = []
+                for row in result:
+                    buffer.append('\t'.join(_copy_value(value) for value in row))
+                    rows += 1
+                    if len(buffer) >= DUMP_YIELD_PER:
+                        out.write(('\n'.join(buffer) + '\n').encode())
+                        buffer = []
+                if buffer:
+                    out.write(('\n'.join(buffer) + '\n').encode())
+                out.write(b'\\.\n')
+                counts[table.name] = rows
+
+            # Keep serial sequences ahead of the restored ids
+            for table in tables:
+                if 'id' in table.columns and table.c.id.autoincrement:
+                    out.write((f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), "
+                               f"COALESCE((SELECT MAX(id) FROM \"{table.name}\"), 1));\n").encode())
+            out.write(b'COMMIT;\n')
+
+    _verify_dump(output, counts)
+    return {'tables': counts, 'integrity': 'ok'}
+
+
+def _verify_dump(path, counts):
+    # Re-read the compressed file end to end and compare the row counts
+    found = {}
+    table = None
+    with _open_decompressed(path) as f:
+        for line in f:
+            if table is None:
+                match = re.match(rb'^COPY "([^"]+)"', line)
+                if match:
+                    table = match.group(1).decode()
+                    found[table] = 0
+            elif line == b'\\.\n':
+                table = None
+            else:
+                found[table] += 1
+    if found != counts:
+        raise BackupError('O dump gravado não confere com as linhas lidas')
+
+
+def apply_retention(backup_dir, database_name, keep, max_age_days=0):
+    """Remove backups de database_name além dos `keep` mais recentes e os mais
+    antigos que max_age_days
+
+    Só considera os arquivos backup_<database_name>_*: backups de outros
+    bancos na mesma pasta não são tocados. O backup mais recente nunca é
+    removido. Retorna os caminhos removidos.
+    """
+    backups = []
+    for name in os.listdir(backup_dir):
+        match = BACKUP_NAME.match(name)
+        if match and match.group(1) == database_name:
+            backups.append((datetime.strptime(match.group(2), '%Y%m%d_%H%M%S'), name))
+    backups.sort(reverse=True)
+
+    cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days else None
+    removed = []
+    for index, (created_at, name) in enumerate(backups):
+        if index == 0:
+            continue
+        if index >= keep or (cutoff and created_at < cutoff):
+            path = os.path.join(backup_dir, name)
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def backup_database(backup_dir=None, compression=None, keep=None, max_age_days=None):
+    """Cria um backup online do banco da aplicação e aplica a retenção
+
+    Os parâmetros omitidos vêm da configuração (BACKUP_*). Retorna um dict
+    com o caminho, o tamanho, a duração, o resultado da verificação e os
+    backups removidos. Em caso de falha nenhum arquivo parcial é mantido.
+    """
+    config = current_app.config
+    backup_dir = backup_dir or config.get('BACKUP_DIR', 'backups')
+    compression = compression or config.get('BACKUP_COMPRESSION', 'gzip')
+    keep = keep if keep is not None else config.get('BACKUP_KEEP', 14)
+    max_age_days = max_age_days if max_age_days is not None else config.get('BACKUP_MAX_AGE_DAYS', 30)
+    if compression not in BACKUP_COMPRESSIONS:
+        raise BackupError(f'Compressão inválida: {compression}')
+
+    url = db.engine.url
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        raise BackupError(f'Backup não suportado para o banco {dialect}')
+
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if dialect == 'sqlite':
+        name = os.path.splitext(os.path.basename(url.database or 'memory'))[0]
+        output = os.path.join(backup_dir, f'backup_{name}_{timestamp}.db{BACKUP_EXTENSIONS[compression]}')
+    else:
+        name = url.database
+        output = os.path.join(backup_dir, f'backup_{name}_{timestamp}.sql{BACKUP_EXTENSIONS[compression]}')
+
+    started = time.perf_counter()
+    try:
+        if dialect == 'sqlite':
+            stats = _sqlite_backup(url.database, output, compression,
+                                   config.get('BACKUP_PAGES_PER_STEP', 1024),
+                                   config.get('BACKUP_STEP_SLEEP_MS', 50) / 1000)
+        else:
+            stats = _postgres_dump(output, compression)
+    except Exception:
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+
+    stats.update({
+        'path': output,
+        'bytes': os.path.getsize(output),
+        'seconds': round(time.perf_counter() - started, 2),
+        'removed': apply_retention(backup_dir, name, keep, max_age_days),
+    })
+    return stats
@@ -0,0 +1,174 @@
+"""
+Cache de leitura do catálogo (produtos e categorias)
+
+O backend padrão vive na memória do processo (TTL + LRU limitado). Para que
+vários workers do gunicorn compartilhem o mesmo estado, aponte
+CATALOG_CACHE_URL para um servidor compatível com Redis.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from models import db, Category, Product
+
+
+class MemoryBackend:
+    """Backend em memória com expiração por TTL e despejo LRU"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Backend compartilhado em um servidor compatível com Redis"""
+
+    def __init__(self, url, prefix='catalog:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('O backend Redis requer o pacote "redis" (pip install redis)')
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.setex(self.prefix + key, int(ttl), json.dumps(value))
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + '*', count=500))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_backend(url, max_entries, prefix='catalog:'):
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url, prefix)
+    return MemoryBackend(max_entries)
+
+
+class CatalogCache:
+    """Cache read-through do catálogo, invalidado em commits que alteram
+    Product ou Category"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['catalog_cache'] = {
+            'backend': create_backend(
+                app.config.get('CATALOG_CACHE_URL', 'memory://'),
+                app.config.get('CATALOG_CACHE_MAX_ENTRIES', 512)
+            ),
+            'ttl': app.config.get('CATALOG_CACHE_TTL', 300),
+            'enabled': app.config.get('CATALOG_CACHE_ENABLED', True),
+            'hits': 0,
+            'misses': 0,
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['catalog_cache']
+
+    def get_or_set(self, key, loader):
+        """Retorna o valor em cache ou executa loader() e armazena o resultado
+
+        loader deve retornar dados serializáveis em JSON.
+        """
+        state = self._state
+        if not state['enabled']:
+            return loader()
+
+        value = state['backend'].get(key)
+        if value is not None:
+            state['hits'] += 1
+            return value
+
+        state['misses'] += 1
+        value = loader()
+        state['backend'].set(key, value, state['ttl'])
+        return value
+
+    def invalidate(self):
+        self._state['backend'].clear()
+
+    def stats(self):
+        state = self._state
+        lookups = state['hits'] + state['misses']
+        return {
+            'hits': state['hits'],
+            'misses': state['misses'],
+            'hit_ratio': state['hits'] / lookups if lookups else 0.0,
+        }
+
+
+catalog_cache = CatalogCache()
+
+
+def mark_catalog_dirty(session):
+    """Marca a sessão para invalidar o catálogo no próximo commit
+
+    Necessário para escritas em massa (insert/update via Core) que não passam
+    pelo flush do ORM.
+    """
+    session.info['catalog_dirty'] = True
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_catalog_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Product, Category)):
+            mark_catalog_dirty(session)
+            return
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('catalog_dirty', False) and has_app_context():
+        if 'catalog_cache' in current_app.extensions:
+            catalog_cache.invalidate()
+        if 'page_cache' in current_app.extensions:
+            from .page_cache import page_cache
+            page_cache.invalidate()
+        if 'replica_routing' in current_app.extensions:
+            # Otherwise the next miss could refill the cache from a lagging replica
+            from .replicas import replica_routing, CATALOG_PIN
+            replica_routing.pin_to_primary(CATALOG_PIN)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('catalog_dirty', None)
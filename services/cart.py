@@ -0,0 +1,275 @@
+"""
+Serviços do carrinho de compras
+
+As funções usam db.session por padrão; o ponto de entrada ASGI passa a
+sessão síncrona de uma AsyncSession em session.
+"""
+
+from sqlalchemy import Integer, bindparam, delete, func, select, update
+
+from models import db, Cart, CartItem, Product
+from .replicas import replica_routing
+from .reservations import hold_cart_lines, release_orphan_holds
+from .upsert import upsert_insert
+
+CART_OPERATIONS = ('add', 'set', 'remove')
+MAX_CART_OPERATIONS = 200
+
+
+class CartOperationError(ValueError):
+    """Operação de carrinho inválida"""
+
+
+def active_cart_id_subquery(user_id):
+    """Subconsulta com o id do carrinho ativo do usuário"""
+    return (
+        select(Cart.id)
+        .where(Cart.user_id == user_id, Cart.is_active == True)
+        .order_by(Cart.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def load_active_cart(user_id, session=None):
+    """Carrega o carrinho ativo, seus produtos e o total em uma única consulta
+
+    Retorna uma tupla (cart_id, lines, total), onde lines é uma lista de
+    (CartItem, Product). cart_id é None quando o usuário não tem carrinho ativo.
+    """
+    stmt = (
+        select(
+            Cart.id,
+            CartItem,
+            Product,
+            func.coalesce(func.sum(Product.price * CartItem.quantity).over(), 0),
+        )
+        .select_from(Cart)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(Cart.id == active_cart_id_subquery(user_id))
+        .order_by(CartItem.id)
+    )
+
+    cart_id = None
+    lines = []
+    total = 0
+    for cart_id, item, product, total in (session or db.session).execute(stmt):
+        if item is not None:
+            lines.append((item, product))
+
+    return cart_id, lines, total
+
+
+def serialize_cart(lines, total):
+    return {
+        'items': [{
+            'id': item.id,
+            'product_id': item.product_id,
+            'quantity': item.quantity,
+            'price': product.price,
+            'name': product.name,
+            'image_url': product.image_url
+        } for item, product in lines],
+        'total': total
+    }
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_quantity(op, quantity):
+    """Valida a quantidade de uma operação: inteiro >= 1 para 'add', >= 0 para 'set'
+
+    Levanta CartOperationError; quantidades negativas reservariam estoque
+    negativo e gerariam pedidos com total negativo.
+    """
+    if not _is_int(quantity) or quantity < (1 if op == 'add' else 0):
+        raise CartOperationError('invalid quantity')
+    return quantity
+
+
+def _parse_operations(operations):
+    if not isinstance(operations, list) or not operations:
+        raise CartOperationError('operations must be a non-empty list')
+    if len(operations) > MAX_CART_OPERATIONS:
+        raise CartOperationError(f'At most {MAX_CART_OPERATIONS} operations per batch')
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in CART_OPERATIONS:
+            raise CartOperationError(f'Operation {index}: op must be one of {", ".join(CART_OPERATIONS)}')
+        op = operation['op']
+        product_id = operation.get('product_id')
+        quantity = operation.get('quantity', 1 if op == 'add' else None)
+        if not _is_int(product_id):
+            raise CartOperationError(f'Operation {index}: product_id must be an integer')
+        if op != 'remove':
+            try:
+                parse_quantity(op, quantity)
+            except CartOperationError as e:
+                raise CartOperationError(f'Operation {index}: {e}')
+        parsed.append((op, product_id, quantity))
+    return parsed
+
+
+def ensure_active_cart(user_id, session=None):
+    """Garante que o usuário tenha um carrinho ativo (sem commit)
+
+    O índice único parcial uq_cart_user_id_active transforma o INSERT do
+    perdedor de uma corrida em no-op, em vez de um segundo carrinho ativo.
+    """
+    session = session or db.session
+    insert = upsert_insert(session)
+    dialect = session.get_bind().dialect.name
+    # ON CONFLICT on a partial index must repeat the index predicate
+    index = next(index for index in Cart.__table__.indexes if index.name == 'uq_cart_user_id_active')
+    session.execute(
+        insert(Cart)
+        .values(user_id=user_id, is_active=True)
+        .on_conflict_do_nothing(index_elements=['user_id'], index_where=index.dialect_options[dialect]['where'])
+    )
+
+
+def _line_upsert(session, user_id, increment):
+    # INSERT ... SELECT from the active cart and the product: no row is
+    # inserted when either is missing, so rowcount 0 means "create the cart
+    # (or reject the product) and retry"
+    insert = upsert_insert(session)
+    cart_item = CartItem.__table__
+    stmt = insert(cart_item).from_select(
+        ['cart_id', 'product_id', 'quantity'],
+        select(Cart.id, Product.id, bindparam('quantity', type_=Integer))
+        .join(Product, Product.id == bindparam('product_id', type_=Integer))
+        .where(Cart.user_id == user_id, Cart.is_active == True)
+    )
+    quantity = cart_item.c.quantity + stmt.excluded.quantity if increment else stmt.excluded.quantity
+    return stmt.on_conflict_do_update(index_elements=['cart_id', 'product_id'], set_={'quantity': quantity})
+
+
+def add_cart_item(user_id, product_id, quantity, session=None):
+    """Soma quantity à linha do produto no carrinho ativo, de forma atômica
+
+    Com o carrinho já criado é um único INSERT ... ON CONFLICT DO UPDATE, de
+    modo que toques concorrentes nunca duplicam a linha nem perdem
+    incrementos. A nova quantidade da linha fica reservada; sem disponível,
+    levanta InsufficientStockError e nada é gravado. Quantidade inválida
+    levanta CartOperationError.
+    """
+    if not _is_int(product_id):
+        raise CartOperationError('product_id must be an integer')
+    parse_quantity('add', quantity)
+    session = session or db.session
+    stmt = _line_upsert(session, user_id, increment=True)
+    params = {'product_id': product_id, 'quantity': quantity}
+    try:
+        if session.execute(stmt, params).rowcount == 0:
+            ensure_active_cart(user_id, session)
+            if session.execute(stmt, params).rowcount == 0:
+                raise CartOperationError(f'Unknown product_id: {product_id}')
+        hold_cart_lines(session, active_cart_id_subquery(user_id), [product_id])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    replica_routing.pin_to_primary(user_id)
+
+
+def set_cart_item_quantity(user_id, item_id, quantity, session=None):
+    """Define a quantidade de uma linha do carrinho ativo; retorna False se não existir
+
+    Quantidade 0 remove a linha. Levanta CartOperationError se a quantidade
+    for inválida e InsufficientStockError se não couber no disponível.
+    """
+    if parse_quantity('set', quantity) == 0:
+        return remove_cart_item(user_id, item_id, session)
+    session = session or db.session
+    try:
+        updated = session.execute(
+            update(CartItem)
+            .where(CartItem.id == item_id, CartItem.cart_id == active_cart_id_subquery(user_id))
+            .values(quantity=quantity)
+            .returning(CartItem.product_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        hold_cart_lines(session, active_cart_id_subquery(user_id), updated)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    replica_routing.pin_to_primary(user_id)
+    return bool(updated)
+
+
+def remove_cart_item(user_id, item_id, session=None):
+    """Remove uma linha do carrinho ativo; retorna False se não existir"""
+    session = session or db.session
+    try:
+        deleted = session.execute(
+            delete(CartItem)
+            .where(CartItem.id == item_id, CartItem.cart_id == active_cart_id_subquery(user_id))
+        ).rowcount
+        release_orphan_holds(session, active_cart_id_subquery(user_id))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    replica_routing.pin_to_primary(user_id)
+    return deleted > 0
+
+
+def apply_cart_operations(user_id, operations, session=None):
+    """Aplica uma lista de operações ao carrinho ativo em uma única transação
+
+    Cada operação é um dict com op ('add' soma à quantidade, 'set' define a
+    quantidade, 0 remove; 'remove' remove a linha), product_id e quantity.
+    As operações são reduzidas a um resultado por produto e gravadas com
+    upserts em lote e as novas quantidades ficam reservadas; se alguma
+    operação for inválida, ou faltar disponível (InsufficientStockError),
+    nada é gravado.
+    """
+    session = session or db.session
+    parsed = _parse_operations(operations)
+
+    product_ids = {product_id for op, product_id, _ in parsed if op != 'remove'}
+    if product_ids:
+        known = set(session.execute(select(Product.id).where(Product.id.in_(product_ids))).scalars())
+        unknown = sorted(product_ids - known)
+        if unknown:
+            raise CartOperationError(f'Unknown product_id: {", ".join(map(str, unknown))}')
+
+    # Fold the sequence into one action per product: either "add n to
+    # whatever is there" or "end up with exactly n" (0 removes)
+    final = {}
+    for op, product_id, quantity in parsed:
+        if op == 'add':
+            kind, value = final.get(product_id, ('add', 0))
+            final[product_id] = (kind, value + quantity)
+        else:
+            final[product_id] = ('set', quantity if op == 'set' else 0)
+
+    # Sorted so concurrent batches lock rows in the same order
+    increments = [{'product_id': p, 'quantity': v} for p, (k, v) in sorted(final.items()) if k == 'add']
+    sets = [{'product_id': p, 'quantity': v} for p, (k, v) in sorted(final.items()) if k == 'set' and v > 0]
+    removals = [p for p, (k, v) in sorted(final.items()) if k == 'set' and v == 0]
+
+    try:
+        ensure_active_cart(user_id, session)
+        if increments:
+            session.execute(_line_upsert(session, user_id, increment=True), increments)
+        if sets:
+            session.execute(_line_upsert(session, user_id, increment=False), sets)
+        if removals:
+            session.execute(
+                delete(CartItem)
+                .where(CartItem.cart_id == active_cart_id_subquery(user_id), CartItem.product_id.in_(removals))
+            )
+            release_orphan_holds(session, active_cart_id_subquery(user_id))
+        hold_cart_lines(session, active_cart_id_subquery(user_id),
+                        [line['product_id'] for line in increments + sets])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    replica_routing.pin_to_primary(user_id)
@@ -0,0 +1,154 @@
+"""
+Consultas do catálogo servidas pelo cache de leitura
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+from models import db, Category, Product
+from .cache import catalog_cache
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 200
+
+PRODUCT_FIELDS = ('id', 'name', 'description', 'price', 'image_url', 'category_id', 'created_at')
+
+PRODUCT_SORT_COLUMNS = {
+    'id': Product.id,
+    'price': Product.price,
+    'name': Product.name,
+    'created_at': Product.created_at,
+}
+
+
+class InvalidQueryError(ValueError):
+    """Parâmetros de consulta inválidos (sort, fields ou cursor)"""
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_cursor(sort_value, last_id):
+    payload = json.dumps([_json_value(sort_value), last_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_name):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort_name == 'created_at':
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(last_id)
+    except (ValueError, TypeError):
+        raise InvalidQueryError('Invalid cursor')
+
+
+def serialize_product(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'description': product.description,
+        'price': product.price,
+        'image_url': product.image_url,
+        'category_id': product.category_id
+    }
+
+
+def serialize_category(category):
+    return {
+        'id': category.id,
+        'name': category.name
+    }
+
+
+def list_categories():
+    """Lista todas as categorias"""
+    return catalog_cache.get_or_set(
+        'categories',
+        lambda: [serialize_category(c) for c in Category.query.order_by(Category.id).all()]
+    )
+
+
+def get_category(category_id):
+    """Retorna a categoria a partir da lista em cache, ou None"""
+    for category in list_categories():
+        if category['id'] == category_id:
+            return category
+    return None
+
+
+def get_category_by_name(name):
+    """Retorna a categoria com esse nome a partir da lista em cache, ou None"""
+    for category in list_categories():
+        if category['name'] == name:
+            return category
+    return None
+
+
+def page_products(category_id=None, sort='id', limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, session=None):
+    """Retorna uma página de produtos usando paginação por keyset
+
+    A ordenação é sempre (sort, id), o que torna a posição representada pelo
+    cursor estável mesmo com inserções concorrentes. sort aceita os nomes de
+    PRODUCT_SORT_COLUMNS, com prefixo '-' para ordem decrescente. fields
+    restringe as colunas selecionadas. Retorna um dict com 'items' e
+    'next_cursor' (None na última página).
+    """
+    descending = sort.startswith('-')
+    sort_name = sort.lstrip('-')
+    if sort_name not in PRODUCT_SORT_COLUMNS:
+        raise InvalidQueryError(f'Invalid sort: {sort}')
+
+    fields = list(fields or PRODUCT_FIELDS)
+    for name in fields:
+        if name not in PRODUCT_FIELDS:
+            raise InvalidQueryError(f'Unknown field: {name}')
+
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    position = decode_cursor(cursor, sort_name) if cursor else None
+
+    def load():
+        sort_column = PRODUCT_SORT_COLUMNS[sort_name]
+        # The cursor needs the sort key and id even when they were not requested
+        columns = list(dict.fromkeys(fields + [sort_name, 'id']))
+        stmt = select(*(getattr(Product, name) for name in columns))
+
+        if category_id:
+            stmt = stmt.where(Product.category_id == category_id)
+        # Row-value comparisons let the (sort_key, id) index seek straight
+        # to the cursor position
+        if sort_name == 'id':
+            key, order = Product.id, [Product.id]
+        else:
+            key, order = tuple_(sort_column, Product.id), [sort_column, Product.id]
+        if position is not None:
+            last = position[1] if sort_name == 'id' else tuple_(*position)
+            stmt = stmt.where(key < last if descending else key > last)
+        stmt = stmt.order_by(*(column.desc() if descending else column for column in order))
+
+        rows = (session or db.session).execute(stmt.limit(limit + 1)).mappings().all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][sort_name], rows[-1]['id'])
+
+        return {
+            'items': [{name: _json_value(row[name]) for name in fields} for row in rows],
+            'next_cursor': next_cursor
+        }
+
+    key = f'products:{category_id or "all"}:{sort}:{limit}:{cursor or ""}:{",".join(fields)}'
+    return catalog_cache.get_or_set(key, load)
+
+
+def featured_products(limit=8):
+    """Produtos em destaque da página inicial"""
+    return catalog_cache.get_or_set(
+        f'featured:{limit}',
+        lambda: [serialize_product(p) for p in Product.query.order_by(Product.id).limit(limit).all()]
+    )
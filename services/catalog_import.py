@@ -0,0 +1,183 @@
+"""
+Importação em massa do catálogo a partir de CSV ou JSONL
+
+Os arquivos são lidos em streaming (memória constante, inclusive .gz) e
+gravados em lotes com INSERT ... ON CONFLICT: categorias pelo nome e
+produtos pelo sku. Colunas ausentes de uma linha não são alteradas em
+produtos já existentes. Uma linha só com "category" (sem sku) cria apenas a
+categoria.
+
+Colunas: sku, name, price, category, description, image_url, stock
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+
+from sqlalchemy import select
+
+from models import db, Category, Product
+from .cache import mark_catalog_dirty
+from .upsert import upsert_insert
+
+DEFAULT_CHUNK_SIZE = 1000
+SEED_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'catalog_seed.jsonl')
+
+
+class CatalogImportError(ValueError):
+    """Linha inválida no arquivo de catálogo"""
+
+    def __init__(self, line, message):
+        super().__init__(f'linha {line}: {message}')
+        self.line = line
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return io.open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_rows(path, fmt=None):
+    """Gera (número da linha, dicionário) a partir de um arquivo CSV ou JSONL"""
+    fmt = fmt or ('csv' if path.removesuffix('.gz').endswith('.csv') else 'jsonl')
+    with _open(path) as stream:
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                # Empty CSV cells mean "not provided"
+                yield reader.line_num, {k: v for k, v in row.items() if k and v not in ('', None)}
+            return
+
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise CatalogImportError(line_no, f'JSON inválido ({e.msg})')
+            if not isinstance(row, dict):
+                raise CatalogImportError(line_no, 'esperado um objeto JSON')
+            yield line_no, {k: v for k, v in row.items() if v is not None}
+
+
+def _product_values(line, row, category_id):
+    try:
+        values = {
+            'sku': str(row['sku']).strip(),
+            'name': str(row['name']).strip(),
+            'price': float(row['price']),
+            'category_id': category_id,
+        }
+        if 'stock' in row:
+            values['stock'] = int(row['stock'])
+    except KeyError as e:
+        raise CatalogImportError(line, f'coluna obrigatória ausente: {e.args[0]}')
+    except (TypeError, ValueError) as e:
+        raise CatalogImportError(line, f'valor inválido ({e})')
+
+    if not values['sku'] or not values['name']:
+        raise CatalogImportError(line, 'sku e name não podem ser vazios')
+    if values['price'] < 0 or values.get('stock', 0) < 0:
+        raise CatalogImportError(line, 'price e stock não podem ser negativos')
+    for column in ('description', 'image_url'):
+        if column in row:
+            values[column] = str(row[column])
+    return values
+
+
+class CatalogImporter:
+    """Acumula linhas e grava lotes de categorias e produtos"""
+
+    def __init__(self, session, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.session = session
+        self.insert = upsert_insert(session)
+        self.chunk_size = chunk_size
+        self.category_ids = {}
+        self.pending = []
+        self.stats = {'rows': 0, 'products': 0, 'categories': 0, 'chunks': 0}
+
+    def add(self, line, row):
+        name = str(row.get('category') or '').strip()
+        if not name:
+            raise CatalogImportError(line, 'coluna obrigatória ausente: category')
+        self.pending.append((line, row, name))
+        self.stats['rows'] += 1
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def _upsert_categories(self, names):
+        # File order, so the seed's Vinhos/Whiskies/Cervejas get ids 1/2/3
+        missing = [name for name in names if name not in self.category_ids]
+        if not missing:
+            return
+        result = self.session.execute(
+            self.insert(Category)
+            .values([{'name': name} for name in missing])
+            .on_conflict_do_nothing(index_elements=['name'])
+        )
+        self.stats['categories'] += max(result.rowcount, 0)
+        rows = self.session.execute(select(Category.id, Category.name).where(Category.name.in_(missing)))
+        self.category_ids.update({name: category_id for category_id, name in rows})
+
+    def _upsert_products(self, products):
+        # Rows with different column sets need different SET clauses
+        by_columns = {}
+        for values in products.values():
+            by_columns.setdefault(tuple(sorted(values)), []).append(values)
+
+        for columns, batch in by_columns.items():
+            stmt = self.insert(Product)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['sku'],
+                set_={column: stmt.excluded[column] for column in columns if column != 'sku'},
+            )
+            self.session.execute(stmt, batch)
+            self.stats['products'] += len(batch)
+
+    def flush(self):
+        if not self.pending:
+            return
+        self._upsert_categories(dict.fromkeys(name for _, _, name in self.pending))
+
+        # A later row for the same sku wins within the chunk
+        products = {}
+        for line, row, name in self.pending:
+            if 'sku' in row or 'name' in row:
+                values = _product_values(line, row, self.category_ids[name])
+                products[values['sku']] = values
+        self._upsert_products(products)
+
+        mark_catalog_dirty(self.session)
+        self.session.commit()
+        self.pending = []
+        self.stats['chunks'] += 1
+
+
+def import_catalog(path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Importa um arquivo de catálogo e retorna as estatísticas da carga
+
+    Cada lote é confirmado separadamente; em caso de erro os lotes anteriores
+    permanecem gravados e o lote corrente é descartado.
+    """
+    importer = CatalogImporter(db.session, chunk_size)
+    started = time.perf_counter()
+    try:
+        for line, row in read_rows(path, fmt):
+            chunks = importer.stats['chunks']
+            importer.add(line, row)
+            if progress and importer.stats['chunks'] != chunks:
+                progress(importer.stats, time.perf_counter() - started)
+        importer.flush()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    stats = dict(importer.stats)
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
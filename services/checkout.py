@@ -0,0 +1,109 @@
+"""
+Serviço de checkout transacional
+"""
+
+from sqlalchemy import insert, select, update
+
+from models import db, Cart, Order, OrderItem, Product
+from .cart import load_active_cart
+from .replicas import replica_routing
+from .reservations import InsufficientStockError, convert_cart_holds, hold_cart_lines, release_orphan_holds
+
+
+class CheckoutError(Exception):
+    """Erro de negócio durante o checkout"""
+
+
+class EmptyCartError(CheckoutError):
+    """O usuário não tem carrinho ativo com itens"""
+
+
+class InvalidCartLineError(CheckoutError):
+    """Uma ou mais linhas do carrinho têm quantidade não positiva"""
+
+    def __init__(self, product_ids):
+        super().__init__('Invalid cart quantity')
+        self.product_ids = product_ids
+
+
+class OutOfStockError(CheckoutError):
+    """Um ou mais produtos não têm estoque suficiente"""
+
+    def __init__(self, product_ids):
+        super().__init__('Insufficient stock')
+        self.product_ids = product_ids
+
+
+def place_order(user_id, shipping_address, payment_method, session=None):
+    """Converte o carrinho ativo em um pedido dentro de uma única transação
+
+    O total é calculado no servidor. O estoque vem das reservas do carrinho,
+    que são convertidas nas do pedido sem travar as linhas dos produtos;
+    linhas cuja reserva venceu tentam reservar de novo e, sem disponível,
+    levantam OutOfStockError. Os itens do pedido são as reservas convertidas,
+    então o vendido é sempre o que o varredor baixa do estoque, mesmo que o
+    carrinho mude durante o checkout. Em caso de erro a transação inteira é
+    desfeita. Retorna o id do pedido criado.
+    """
+    session = session or db.session
+    cart_id, lines, _ = load_active_cart(user_id, session)
+    if not lines:
+        raise EmptyCartError('Cart is empty')
+    # Checked before holding: a negative line would produce a negative total
+    invalid = sorted(item.product_id for item, _ in lines if item.quantity <= 0)
+    if invalid:
+        raise InvalidCartLineError(invalid)
+
+    try:
+        try:
+            hold_cart_lines(session, cart_id, [item.product_id for item, _ in lines])
+        except InsufficientStockError as e:
+            raise OutOfStockError(e.product_ids)
+        # Lines removed since the read above must not be sold
+        release_orphan_holds(session, cart_id)
+
+        order = Order(
+            user_id=user_id,
+            total_amount=0,
+            shipping_address=shipping_address,
+            payment_method=payment_method,
+            status='pending'
+        )
+        session.add(order)
+        session.flush()
+
+        sold = sorted(convert_cart_holds(session, cart_id, order.id))
+        if not sold:
+            raise EmptyCartError('Cart is empty')
+        prices = dict(session.execute(
+            select(Product.id, Product.price).where(Product.id.in_([product_id for product_id, _ in sold]))
+        ).all())
+        session.execute(insert(OrderItem), [{
+            'order_id': order.id,
+            'product_id': product_id,
+            'quantity': quantity,
+            'price': prices[product_id]
+        } for product_id, quantity in sold])
+        order.total_amount = sum(prices[product_id] * quantity for product_id, quantity in sold)
+
+        # Guards against the same cart being checked out twice concurrently
+        result = session.execute(
+            update(Cart)
+            .where(Cart.id == cart_id, Cart.is_active == True)
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise EmptyCartError('Cart is empty')
+
+        # Product.stock is decremented later, in batches, by the sweeper;
+        # sales rollups are summed by flask rollup-sales
+        order_id = order.id
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    # Order history is read from replicas; show the new order right away
+    replica_routing.pin_to_primary(user_id)
+    return order_id
@@ -0,0 +1,124 @@
+"""
+Exportação de pedidos em streaming (CSV ou NDJSON, opcionalmente gzip)
+
+As linhas vêm de um único SELECT Order → OrderItem → Product lido com
+yield_per (cursor do lado do servidor no PostgreSQL) e são escritas em
+blocos por geradores, então a memória fica constante qualquer que seja o
+tamanho da exportação.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select
+
+from models import db, Order, OrderItem, Product
+from .catalog import InvalidQueryError
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_YIELD_PER = 2000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_COLUMNS = {
+    'order_id': Order.id,
+    'created_at': Order.created_at,
+    'user_id': Order.user_id,
+    'status': Order.status,
+    'payment_method': Order.payment_method,
+    'order_total': Order.total_amount,
+    'item_id': OrderItem.id,
+    'product_id': OrderItem.product_id,
+    'sku': Product.sku,
+    'product_name': Product.name,
+    'quantity': OrderItem.quantity,
+    'unit_price': OrderItem.price,
+}
+
+
+def parse_export_filters(start=None, end=None, status=None):
+    """Converte os filtros textuais (datas YYYY-MM-DD, fim inclusivo)"""
+    try:
+        start_at = datetime.combine(date.fromisoformat(start), time.min) if start else None
+        end_before = datetime.combine(date.fromisoformat(end) + timedelta(days=1), time.min) if end else None
+    except ValueError:
+        raise InvalidQueryError('Invalid date, expected YYYY-MM-DD')
+    if start_at and end_before and start_at >= end_before:
+        raise InvalidQueryError('start must not be after end')
+    return {'start_at': start_at, 'end_before': end_before, 'status': status or None}
+
+
+def order_export_rows(start_at=None, end_before=None, status=None, yield_per=EXPORT_YIELD_PER):
+    """Gera uma tupla por item de pedido, em ordem de data do pedido"""
+    stmt = (
+        select(*EXPORT_COLUMNS.values())
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .order_by(Order.created_at, Order.id, OrderItem.id)
+    )
+    if start_at:
+        stmt = stmt.where(Order.created_at >= start_at)
+    if end_before:
+        stmt = stmt.where(Order.created_at < end_before)
+    if status:
+        stmt = stmt.where(Order.status == status)
+
+    result = db.session.execute(stmt, execution_options={'yield_per': yield_per})
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def _buffered(lines):
+    # One write per row would mean one tiny chunk per row on the socket
+    buffer = io.StringIO()
+    for line in lines:
+        buffer.write(line)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _csv_lines(rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+    if line.tell():
+        # Header only: nothing matched the filters
+        yield line.getvalue()
+
+
+def _ndjson_lines(rows):
+    columns = tuple(EXPORT_COLUMNS)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=datetime.isoformat, ensure_ascii=False) + '\n'
+
+
+def gzip_chunks(chunks):
+    """Comprime um fluxo de bytes em formato gzip, bloco a bloco"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_orders(fmt='csv', compress=False, **filters):
+    """Gera os bytes da exportação no formato pedido"""
+    if fmt not in EXPORT_FORMATS:
+        raise InvalidQueryError(f'Invalid format: {fmt}')
+    lines = _csv_lines if fmt == 'csv' else _ndjson_lines
+    chunks = _buffered(lines(order_export_rows(**filters)))
+    return gzip_chunks(chunks) if compress else chunks
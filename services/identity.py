@@ -0,0 +1,56 @@
+"""
+Identidade do usuário logado, resolvida uma vez por requisição
+
+A sessão guarda um snapshot assinado (nome e is_admin) gravado no login, o
+que permite renderizar a barra de navegação sem consultar o banco. O
+registro completo de User só é carregado se algum código acessar um campo
+fora do snapshot, e nesse caso fica em flask.g até o fim da requisição.
+"""
+
+from flask import g, session
+
+from models import db, User
+
+IDENTITY_FIELDS = ('id', 'first_name', 'last_name', 'is_admin')
+
+
+def remember_identity(user):
+    """Grava o usuário na sessão junto com o snapshot de identidade"""
+    session['user_id'] = user.id
+    session['is_admin'] = user.is_admin
+    session['identity'] = {field: getattr(user, field) for field in IDENTITY_FIELDS}
+    g.current_user = user
+
+
+def load_current_user():
+    """Retorna o User da sessão, consultando o banco no máximo uma vez por requisição"""
+    if 'user_id' not in session:
+        return None
+    if 'current_user' not in g:
+        g.current_user = db.session.get(User, session['user_id'])
+        if g.current_user is not None and 'identity' not in session:
+            # Sessions created before snapshots existed pick one up here
+            session['identity'] = {field: getattr(g.current_user, field) for field in IDENTITY_FIELDS}
+    return g.current_user
+
+
+class CurrentUserProxy:
+    """Proxy preguiçoso do usuário logado para os templates"""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot or {}
+
+    def __getattr__(self, name):
+        if name in self._snapshot:
+            return self._snapshot[name]
+        return getattr(load_current_user(), name)
+
+    def __bool__(self):
+        return True
+
+
+def current_user_proxy():
+    """Valor de current_user nos templates: None para visitantes anônimos"""
+    if 'user_id' not in session:
+        return None
+    return CurrentUserProxy(session.get('identity'))
@@ -0,0 +1,206 @@
+"""
+Instrumentação por requisição: SQL, templates e tempo total
+
+Cada requisição acumula o número de comandos SQL, o tempo gasto no banco e
+na renderização de templates. Os valores saem no cabeçalho Server-Timing e
+alimentam histogramas por endpoint expostos em formato Prometheus em
+/metrics. Requisições lentas e padrões N+1 (o mesmo comando repetido além de
+METRICS_N_PLUS_ONE_THRESHOLD vezes) são registrados no log.
+
+Os histogramas vivem na memória de cada processo; com vários workers do
+gunicorn, cada scrape enxerga o worker que o atendeu.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)')
+
+
+def statement_shape(statement):
+    """Normaliza um comando SQL para agrupar repetições (listas IN variáveis)"""
+    return ' '.join(_PLACEHOLDER_LIST.sub('(?)', statement).split())
+
+
+class Histogram:
+    """Histograma Prometheus com rótulos, seguro entre threads"""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                base = ','.join(f'{k}="{v}"' for k, v in zip(self.labelnames, labels))
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{base}}} {series["sum"]:.6f}')
+                lines.append(f'{self.name}_count{{{base}}} {series["count"]}')
+        return lines
+
+
+class RequestMetrics:
+    """Extensão que mede cada requisição e publica /metrics"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        labels = ('endpoint', 'method')
+        app.extensions['request_metrics'] = {
+            'request_seconds': Histogram('http_request_duration_seconds',
+                                         'Tempo total de processamento da requisição', labels, DURATION_BUCKETS),
+            'db_seconds': Histogram('db_time_seconds',
+                                    'Tempo gasto em comandos SQL por requisição', labels, DURATION_BUCKETS),
+            'db_statements': Histogram('db_statements_per_request',
+                                       'Comandos SQL executados por requisição', labels, STATEMENT_BUCKETS),
+            'template_seconds': Histogram('template_render_seconds',
+                                          'Tempo de renderização de templates por requisição', labels, DURATION_BUCKETS),
+        }
+
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        before_render_template.connect(_template_started, app)
+        template_rendered.connect(_template_finished, app)
+        app.add_url_rule('/metrics', 'metrics', _metrics_view)
+
+
+def _start_request():
+    g.request_metrics = {
+        'started': time.perf_counter(),
+        'db_seconds': 0.0,
+        'statements': 0,
+        'shapes': Counter(),
+        'template_seconds': 0.0,
+        'template_started': [],
+    }
+
+
+def _template_started(sender, template, context, **extra):
+    if 'request_metrics' in g:
+        g.request_metrics['template_started'].append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    metrics = g.get('request_metrics')
+    if metrics and metrics['template_started']:
+        started = metrics['template_started'].pop()
+        # Only count the outermost template so includes are not added twice
+        if not metrics['template_started']:
+            metrics['template_seconds'] += time.perf_counter() - started
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, not the pooled connection: a statement that
+    # raises never reaches after_cursor_execute and would leave a stale entry
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None or not has_request_context():
+        return
+    metrics = g.get('request_metrics')
+    if metrics is not None:
+        metrics['db_seconds'] += time.perf_counter() - started
+        metrics['statements'] += 1
+        metrics['shapes'][statement_shape(statement)] += 1
+
+
+def _finish_request(response):
+    metrics = g.pop('request_metrics', None)
+    if metrics is None:
+        return response
+
+    total = time.perf_counter() - metrics['started']
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={metrics["db_seconds"] * 1000:.2f};desc="{metrics["statements"]} statements", '
+        f'tpl;dur={metrics["template_seconds"] * 1000:.2f}, '
+        f'app;dur={total * 1000:.2f}'
+    )
+
+    endpoint = request.endpoint or 'unmatched'
+    if endpoint == 'metrics':
+        return response
+
+    state = current_app.extensions['request_metrics']
+    labels = (endpoint, request.method)
+    state['request_seconds'].observe(labels, total)
+    state['db_seconds'].observe(labels, metrics['db_seconds'])
+    state['db_statements'].observe(labels, metrics['statements'])
+    state['template_seconds'].observe(labels, metrics['template_seconds'])
+
+    slow_ms = current_app.config.get('METRICS_SLOW_REQUEST_MS', 500)
+    if total * 1000 >= slow_ms:
+        current_app.logger.warning(
+            'Requisição lenta: %s %s levou %.0fms (%d comandos SQL, %.0fms no banco)',
+            request.method, request.path, total * 1000, metrics['statements'], metrics['db_seconds'] * 1000
+        )
+
+    threshold = current_app.config.get('METRICS_N_PLUS_ONE_THRESHOLD', 10)
+    for shape, count in metrics['shapes'].items():
+        if count > threshold:
+            current_app.logger.warning(
+                'Possível N+1 em %s %s: comando repetido %d vezes: %s',
+                request.method, request.path, count, shape[:300]
+            )
+
+    return response
+
+
+def _metrics_view():
+    state = current_app.extensions['request_metrics']
+    lines = []
+    for histogram in state.values():
+        lines.extend(histogram.render())
+
+    cache = current_app.extensions.get('catalog_cache')
+    if cache is not None:
+        lines.extend([
+            '# HELP catalog_cache_hits_total Acertos do cache do catálogo',
+            '# TYPE catalog_cache_hits_total counter',
+            f'catalog_cache_hits_total {cache["hits"]}',
+            '# HELP catalog_cache_misses_total Falhas do cache do catálogo',
+            '# TYPE catalog_cache_misses_total counter',
+            f'catalog_cache_misses_total {cache["misses"]}',
+        ])
+
+    return '\n'.join(lines) + '\n', 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,83 @@
+"""
+Histórico de pedidos paginado por keyset (mais recentes primeiro)
+"""
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import selectinload
+
+from models import db, Order, OrderItem, Product
+from .catalog import decode_cursor, encode_cursor
+
+DEFAULT_ORDER_PAGE_SIZE = 20
+MAX_ORDER_PAGE_SIZE = 100
+
+
+def page_orders(user_id, limit=DEFAULT_ORDER_PAGE_SIZE, cursor=None, with_items=False, session=None):
+    """Retorna uma página de pedidos do usuário ordenada por (created_at, id) decrescente
+
+    Com with_items, os itens e seus produtos são carregados com selectinload
+    (duas consultas a mais por página, independentemente do tamanho). Retorna
+    um dict com 'orders' e 'next_cursor' (None na última página).
+    """
+    limit = max(1, min(limit or DEFAULT_ORDER_PAGE_SIZE, MAX_ORDER_PAGE_SIZE))
+
+    stmt = select(Order).where(Order.user_id == user_id)
+    if cursor:
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(*decode_cursor(cursor, 'created_at')))
+    stmt = stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+    if with_items:
+        stmt = stmt.options(selectinload(Order.items).selectinload(OrderItem.product))
+
+    orders = (session or db.session).execute(stmt).scalars().all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+
+    return {'orders': orders, 'next_cursor': next_cursor}
+
+
+def order_summaries(order_ids, session=None):
+    """Quantidade de itens e nome do primeiro produto de cada pedido, em uma consulta"""
+    if not order_ids:
+        return {}
+
+    totals = (
+        select(
+            OrderItem.order_id,
+            func.count(OrderItem.id).label('line_count'),
+            func.sum(OrderItem.quantity).label('item_count'),
+            func.min(OrderItem.id).label('first_item_id'),
+        )
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    stmt = (
+        select(totals.c.order_id, totals.c.line_count, totals.c.item_count, Product.name)
+        .join(OrderItem, OrderItem.id == totals.c.first_item_id)
+        .join(Product, Product.id == OrderItem.product_id)
+    )
+    summaries = {order_id: {'line_count': 0, 'item_count': 0, 'first_product_name': None} for order_id in order_ids}
+    for order_id, line_count, item_count, name in (session or db.session).execute(stmt):
+        summaries[order_id] = {'line_count': line_count, 'item_count': item_count, 'first_product_name': name}
+    return summaries
+
+
+def serialize_order(order, summary=None, with_items=False):
+    data = {
+        'id': order.id,
+        'date': order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'total_amount': order.total_amount,
+        'status': order.status
+    }
+    if summary is not None:
+        data.update(summary)
+    if with_items:
+        data['items'] = [{
+            'product_id': item.product_id,
+            'name': item.product.name,
+            'quantity': item.quantity,
+            'price': item.price
+        } for item in order.items]
+    return data
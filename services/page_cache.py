@@ -0,0 +1,115 @@
+"""
+Cache de páginas da vitrine (início, lista de produtos e página do produto)
+
+O conteúdo dessas páginas depende só da rota e dos seus parâmetros; o que
+muda por visitante (barra de navegação, mensagens, modal de idade) fica no
+layout, renderizado a cada requisição em volta dos blocos em cache. Para
+visitantes anônimos sem mensagens pendentes, que recebem todos a mesma
+página, a resposta inteira fica em cache junto com o ETag; o modal de idade
+é decidido no navegador, por um cookie, para não separar esses visitantes.
+
+As respostas levam ETag forte e Cache-Control (public com s-maxage para
+visitantes sem sessão, private para os demais), e If-None-Match devolve
+304. O cache é esvaziado nos commits que alteram Product ou Category,
+junto com o cache do catálogo.
+"""
+
+from flask import current_app, make_response, render_template, request, session
+
+from .cache import create_backend
+
+# Template blocks cached per page; base.html renders them from page_fragments
+PAGE_BLOCKS = ('title', 'content')
+
+
+def render_blocks(template_name, blocks, **context):
+    """Renderiza apenas os blocos indicados de um template: {bloco: html}"""
+    app = current_app._get_current_object()
+    template = app.jinja_env.get_template(template_name)
+    app.update_template_context(context)
+    template_context = template.new_context(context)
+    return {name: ''.join(template.blocks[name](template_context))
+            for name in blocks if name in template.blocks}
+
+
+class PageCache:
+    """Blocos e páginas renderizados da vitrine, invalidados junto com o catálogo"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['page_cache'] = {
+            'backend': create_backend(
+                app.config.get('PAGE_CACHE_URL', 'memory://'),
+                app.config.get('PAGE_CACHE_MAX_ENTRIES', 256),
+                prefix='page:'
+            ),
+            'ttl': app.config.get('PAGE_CACHE_TTL', 300),
+            'max_age': app.config.get('PAGE_CACHE_MAX_AGE', 60),
+            'enabled': app.config.get('PAGE_CACHE_ENABLED', True),
+            'hits': 0,
+            'misses': 0,
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['page_cache']
+
+    def render(self, template_name, key, loader):
+        """Resposta da página key com ETag, Cache-Control e 304 condicional
+
+        loader() retorna o contexto do template e só é chamado quando os
+        blocos da página não estão em cache.
+        """
+        state = self._state
+        # Anonymous without pending flash messages: the whole page is the same
+        # for every visitor (the age gate is checked in the browser)
+        shared = 'user_id' not in session and '_flashes' not in session
+        page = state['backend'].get(f'full:{key}') if state['enabled'] and shared else None
+
+        if page is not None:
+            state['hits'] += 1
+            response = make_response(page['body'])
+            response.set_etag(page['etag'])
+        else:
+            fragments = state['backend'].get(f'blocks:{key}') if state['enabled'] else None
+            if fragments is None:
+                state['misses'] += 1
+                fragments = render_blocks(template_name, PAGE_BLOCKS, **loader())
+                if state['enabled']:
+                    state['backend'].set(f'blocks:{key}', fragments, state['ttl'])
+            else:
+                state['hits'] += 1
+            response = make_response(render_template(template_name, page_fragments=fragments))
+            response.add_etag()
+            if state['enabled'] and shared:
+                state['backend'].set(f'full:{key}', {
+                    'body': response.get_data(as_text=True),
+                    'etag': response.get_etag()[0],
+                }, state['ttl'])
+
+        if shared:
+            response.cache_control.public = True
+            response.cache_control.max_age = 0
+            response.cache_control.s_maxage = state['max_age']
+        else:
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def invalidate(self):
+        self._state['backend'].clear()
+
+    def stats(self):
+        state = self._state
+        lookups = state['hits'] + state['misses']
+        return {
+            'hits': state['hits'],
+            'misses': state['misses'],
+            'hit_ratio': state['hits'] / lookups if lookups else 0.0,
+        }
+
+
+page_cache = PageCache()
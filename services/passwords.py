@@ -0,0 +1,76 @@
+"""
+Hash de senhas fora das threads de requisição
+
+O PBKDF2/scrypt do Werkzeug é CPU-bound e, executado inline, cada login
+concorre por CPU com o tráfego do catálogo. Aqui o hashing roda em um pool
+dedicado e limitado: quando há mais pedidos pendentes do que
+PASSWORD_HASH_MAX_PENDING, a chamada espera até PASSWORD_HASH_WAIT_TIMEOUT e
+então falha com PasswordHasherBusy, que as rotas convertem em 503.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """O pool de hashing está saturado"""
+
+
+class PasswordHasher:
+    """Extensão que executa generate/check_password_hash em um pool limitado"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        executor = None
+        if workers > 0:
+            pool_class = ProcessPoolExecutor if app.config.get('PASSWORD_HASH_EXECUTOR') == 'process' else ThreadPoolExecutor
+            executor = pool_class(max_workers=workers)
+
+        app.extensions['password_hasher'] = {
+            'method': app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2'),
+            'executor': executor,
+            'slots': threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_PENDING', 16)),
+            'wait_timeout': app.config.get('PASSWORD_HASH_WAIT_TIMEOUT', 2.0),
+            'prefix': None,
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['password_hasher']
+
+    def _run(self, func, *args):
+        state = self._state
+        if state['executor'] is None:
+            return func(*args)
+
+        if not state['slots'].acquire(timeout=state['wait_timeout']):
+            raise PasswordHasherBusy('Password hashing queue is full')
+        try:
+            return state['executor'].submit(func, *args).result()
+        finally:
+            state['slots'].release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self._state['method'])
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+        state = self._state
+        if state['prefix'] is None:
+            # Werkzeug fills in default parameters (e.g. 'pbkdf2' becomes
+            # 'pbkdf2:sha256:600000'); learn the full prefix once
+            state['prefix'] = generate_password_hash('', state['method']).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != state['prefix']
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,205 @@
+"""
+Verificação dos planos de consulta dos endpoints
+
+Executa os endpoints principais contra um banco de rascunho, registra cada
+SELECT/UPDATE/DELETE emitido e roda EXPLAIN QUERY PLAN (SQLite) ou EXPLAIN
+(PostgreSQL) sobre ele, apontando varreduras completas de tabela.
+"""
+
+import json
+import re
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, text
+
+from models import db, Category, Product, User
+
+# Small lookup tables that are read in full by design
+FULL_SCAN_ALLOWED = {'category'}
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+
+class ScenarioError(Exception):
+    """Uma requisição do cenário falhou; seus planos não foram verificados"""
+
+
+def _seed():
+    db.session.add_all([Category(name='Vinhos'), Category(name='Whiskies')])
+    db.session.flush()
+    db.session.add_all([
+        Product(name='Vinho Tinto', description='Vinho encorpado', price=89.9, category_id=1),
+        Product(name='Whisky Single Malt', description='Whisky escocês', price=250.0, category_id=2),
+        Product(name='Bourbon', description='Whisky americano', price=180.0, category_id=2),
+    ])
+    user = User(email='plans@example.com', password='-', first_name='Plano', is_admin=True)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def endpoint_scenario(user_id):
+    """Requisições exercitadas, na ordem, como (rótulo, método, url, kwargs)"""
+    return [
+        ('GET /', 'get', '/', {}),
+        ('GET /products', 'get', '/products', {}),
+        ('GET /products/<category_id>', 'get', '/products/2?sort=price', {}),
+        ('GET /products?q=', 'get', '/products?q=whisky', {}),
+        ('GET /api/products', 'get', '/api/products?limit=2', {}),
+        ('GET /api/products?cursor', 'get', '/api/products?limit=1&cursor={cursor}', {}),
+        ('GET /api/products?category_id', 'get', '/api/products?category_id=2', {}),
+        ('GET /api/products?sort=price', 'get', '/api/products?sort=-price&limit=1', {}),
+        ('GET /api/products?sort=price&cursor', 'get', '/api/products?sort=-price&limit=1&cursor={cursor}', {}),
+        ('GET /api/products?sort=name', 'get', '/api/products?sort=name', {}),
+        ('GET /api/products?sort=created_at', 'get', '/api/products?sort=created_at', {}),
+        ('GET /api/products/search', 'get', '/api/products/search?q=whisky', {}),
+        ('GET /api/categories', 'get', '/api/categories', {}),
+        ('GET /product/<id>', 'get', '/product/2', {}),
+        ('GET /api/products/<id>/related', 'get', '/api/products/2/related', {}),
+        ('GET /api/products/availability', 'get', '/api/products/availability?ids=1,2,3', {}),
+        ('POST /api/cart/add', 'post', '/api/cart/add', {'json': {'product_id': 2, 'quantity': 1}}),
+        ('POST /api/cart/add (existing line)', 'post', '/api/cart/add', {'json': {'product_id': 2, 'quantity': 1}}),
+        ('PUT /api/cart/update', 'put', '/api/cart/update', {'json': {'item_id': 1, 'quantity': 2}}),
+        ('POST /api/cart/batch', 'post', '/api/cart/batch', {'json': {'operations': [
+            {'op': 'add', 'product_id': 1, 'quantity': 1},
+            {'op': 'set', 'product_id': 2, 'quantity': 3},
+            {'op': 'remove', 'product_id': 1},
+        ]}}),
+        ('GET /api/cart', 'get', '/api/cart', {}),
+        ('GET /cart', 'get', '/cart', {'session': True}),
+        ('POST /api/checkout', 'post', '/api/checkout',
+         {'json': {'shipping_address': 'Rua A, 1', 'payment_method': 'pix'}}),
+        ('GET /api/user/orders', 'get', '/api/user/orders?include=items,summary', {}),
+        ('GET /profile', 'get', '/profile', {'session': True}),
+        ('POST /api/cart/add (new cart)', 'post', '/api/cart/add', {'json': {'product_id': 1, 'quantity': 1}}),
+        ('DELETE /api/cart/remove', 'delete', '/api/cart/remove?item_id=2', {}),
+        ('POST /api/cart/add (second order)', 'post', '/api/cart/add', {'json': {'product_id': 3, 'quantity': 1}}),
+        ('POST /api/checkout (second order)', 'post', '/api/checkout',
+         {'json': {'shipping_address': 'Rua A, 1', 'payment_method': 'pix'}}),
+        ('GET /api/user/orders?limit', 'get', '/api/user/orders?limit=1', {}),
+        ('GET /api/user/orders?cursor', 'get', '/api/user/orders?limit=1&include=items&cursor={cursor}', {}),
+        ('GET /api/admin/analytics', 'get', '/api/admin/analytics?limit=5', {}),
+    ]
+
+
+def record_endpoint_statements(app):
+    """Executa o cenário e retorna [(rótulo, sql, parâmetros)]
+
+    Levanta ScenarioError se alguma requisição falhar ou não retornar 2xx/3xx.
+    """
+    recorded = []
+    current = {'label': None}
+
+    with app.app_context():
+        db.create_all()
+        user_id = _seed()
+        token = create_access_token(identity=user_id)
+        engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if current['label'] and verb in ('SELECT', 'UPDATE', 'DELETE', 'WITH') and not executemany:
+            recorded.append((current['label'], statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        cursor = None
+        for label, method, url, kwargs in endpoint_scenario(user_id):
+            if kwargs.pop('session', False):
+                with client.session_transaction() as session:
+                    session['user_id'] = user_id
+            current['label'] = label
+            try:
+                response = getattr(client, method)(url.format(cursor=cursor or ''), headers=headers, **kwargs)
+            except Exception as e:
+                raise ScenarioError(f'{label}: {e!r}') from e
+            # A failed request skips the queries it was meant to check
+            if response.status_code >= 400:
+                raise ScenarioError(f'{label}: HTTP {response.status_code}')
+            cursor = response.headers.get('X-Next-Cursor', cursor)
+            current['label'] = None
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    return recorded
+
+
+def explain(connection, statement, parameters):
+    """Retorna o plano como lista de linhas de texto"""
+    dialect = connection.dialect.name
+    raw = connection.connection.driver_connection
+    cursor = raw.cursor()
+    try:
+        if dialect == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        plan = cursor.fetchone()[0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        return list(_postgres_nodes(plan[0]['Plan']))
+    finally:
+        cursor.close()
+
+
+def _postgres_nodes(node):
+    yield f"{node['Node Type']} {node.get('Relation Name', '')}".strip()
+    for child in node.get('Plans', []):
+        yield from _postgres_nodes(child)
+
+
+def full_scans(dialect, statement, plan, tables):
+    """Tabelas lidas por varredura completa segundo o plano"""
+    scans = []
+    for line in plan:
+        if dialect == 'sqlite':
+            match = SQLITE_SCAN.match(line)
+            if not match or 'INDEX' in line or 'VIRTUAL TABLE' in line:
+                continue
+            # An unfiltered scan in rowid order that stops at LIMIT (a first
+            # page) reads only the rows it returns
+            upper = ' '.join(statement.split()).upper()
+            if ' LIMIT ' in upper and ' WHERE ' not in upper and not any('TEMP B-TREE' in l for l in plan):
+                continue
+            name = match.group(1)
+        else:
+            if not line.startswith('Seq Scan '):
+                continue
+            name = line.split(' ', 2)[2]
+        # SQLite reports aliases; map them back to table names
+        table = name if name in tables else _alias_table(statement, name, tables)
+        if table and table not in FULL_SCAN_ALLOWED:
+            scans.append(table)
+    return scans
+
+
+def _alias_table(statement, alias, tables):
+    match = re.search(r'\b"?(\w+)"?\s+(?:AS\s+)?' + re.escape(alias) + r'\b', statement, re.IGNORECASE)
+    if match and match.group(1) in tables:
+        return match.group(1)
+    return None
+
+
+def check_query_plans(app):
+    """Retorna [(rótulo, sql, plano, tabelas_varridas)] para cada consulta"""
+    statements = record_endpoint_statements(app)
+    tables = set(db.metadata.tables)
+    results = []
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            dialect = connection.dialect.name
+            if dialect == 'postgresql':
+                # Tiny scratch tables always favour seq scans; ask whether an
+                # index path exists at all
+                connection.execute(text('SET enable_seqscan = off'))
+            seen = set()
+            for label, statement, parameters in statements:
+                if (label, statement) in seen:
+                    continue
+                seen.add((label, statement))
+                plan = explain(connection, statement, parameters)
+                results.append((label, statement, plan, full_scans(dialect, statement, plan, tables)))
+
+    return results
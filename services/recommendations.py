@@ -0,0 +1,157 @@
+"""
+Produtos relacionados pré-calculados a partir das compras
+
+`flask build-recommendations` lê OrderItem em blocos, monta a matriz esparsa
+pedido × produto e dela a coocorrência produto × produto. Para cada produto
+ficam os RECOMMENDATIONS_TOP_K vizinhos de maior similaridade (cosseno
+entre os pedidos de cada produto) em product_recommendation, lida pela
+chave primária (product_id, rank). Produtos sem vizinhos (sem vendas, ou
+sempre comprados sozinhos) usam os da mesma categoria.
+
+O cálculo requer numpy e scipy; servir as recomendações, não.
+"""
+
+from sqlalchemy import delete, insert, select
+
+from models import db, OrderItem, Product, ProductRecommendation
+from .cache import catalog_cache, mark_catalog_dirty
+from .catalog import serialize_product
+
+
+def _require_scipy():
+    try:
+        import numpy
+        from scipy import sparse
+    except ImportError:
+        raise RuntimeError('O cálculo de recomendações requer os pacotes "numpy" e "scipy" '
+                           '(pip install -r requirements-recommendations.txt)')
+    return numpy, sparse
+
+
+def _order_lines(session, chunk_size):
+    # Keyset over the primary key keeps each read to one bounded chunk
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(OrderItem.id, OrderItem.order_id, OrderItem.product_id)
+            .where(OrderItem.id > last_id)
+            .order_by(OrderItem.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _neighbours(np, sparse, order_ids, product_ids, min_support):
+    # Incidence matrix: one row per order, one column per product id
+    _, order_index = np.unique(order_ids, return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(order_index), dtype=np.int32), (order_index, product_ids)),
+        shape=(int(order_index.max()) + 1, int(product_ids.max()) + 1)
+    )
+    incidence.sum_duplicates()
+    # Several lines of one product in an order count as one purchase
+    incidence.data[:] = 1
+
+    together = (incidence.T @ incidence).tocsr()
+    purchases = together.diagonal()
+    together.setdiag(0)
+    together.data[together.data < min_support] = 0
+    together.eliminate_zeros()
+
+    # Cosine similarity keeps best sellers from topping every list
+    norms = np.sqrt(purchases)
+    rows = np.repeat(np.arange(together.shape[0]), np.diff(together.indptr))
+    scores = together.data / (norms[rows] * norms[together.indices])
+    return together, scores
+
+
+def build_recommendations(top_k=12, min_support=1, chunk_size=50000, session=None):
+    """Recalcula product_recommendation a partir de todos os itens de pedido
+
+    Substitui a tabela inteira em uma transação; as leituras veem a versão
+    anterior até o commit. Retorna um dict com as contagens.
+    """
+    np, sparse = _require_scipy()
+    session = session or db.session
+    stats = {'lines': 0, 'orders': 0, 'products': 0, 'recommendations': 0}
+
+    order_chunks, product_chunks = [], []
+    for rows in _order_lines(session, chunk_size):
+        chunk = np.array(rows, dtype=np.int64)
+        order_chunks.append(chunk[:, 1])
+        product_chunks.append(chunk[:, 2])
+
+    records = []
+    if order_chunks:
+        order_ids = np.concatenate(order_chunks)
+        product_ids = np.concatenate(product_chunks)
+        stats['lines'] = len(order_ids)
+        stats['orders'] = len(np.unique(order_ids))
+
+        together, scores = _neighbours(np, sparse, order_ids, product_ids, min_support)
+        # Products deleted since they were sold are neither sources nor neighbours
+        live = np.zeros(together.shape[0], dtype=bool)
+        existing = np.array(session.execute(select(Product.id)).scalars().all(), dtype=np.int64)
+        live[existing[existing < len(live)]] = True
+
+        for product_id in np.flatnonzero(np.diff(together.indptr)):
+            if not live[product_id]:
+                continue
+            start, end = together.indptr[product_id], together.indptr[product_id + 1]
+            columns = together.indices[start:end]
+            keep = live[columns]
+            columns, counts, row_scores = columns[keep], together.data[start:end][keep], scores[start:end][keep]
+            # Best score first; ties go to more shared orders, then the lower id
+            for rank, index in enumerate(np.lexsort((columns, -counts, -row_scores))[:top_k]):
+                records.append({
+                    'product_id': int(product_id),
+                    'rank': rank,
+                    'related_product_id': int(columns[index]),
+                    'score': float(row_scores[index]),
+                })
+            stats['products'] += bool(len(columns))
+
+    try:
+        session.execute(delete(ProductRecommendation))
+        for start in range(0, len(records), chunk_size):
+            session.execute(insert(ProductRecommendation), records[start:start + chunk_size])
+        # Related products are cached with the catalog and inside product pages
+        mark_catalog_dirty(session)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    stats['recommendations'] = len(records)
+    return stats
+
+
+def related_products(product_id, limit=4):
+    """Produtos relacionados serializados, ou None se o produto não existe
+
+    Uma leitura pela chave primária de product_recommendation; só produtos
+    sem recomendações consultam a mesma categoria.
+    """
+    def load():
+        products = db.session.execute(
+            select(Product)
+            .join(ProductRecommendation, ProductRecommendation.related_product_id == Product.id)
+            .where(ProductRecommendation.product_id == product_id)
+            .order_by(ProductRecommendation.rank)
+            .limit(limit)
+        ).scalars().all()
+        if not products:
+            category_id = db.session.scalar(select(Product.category_id).where(Product.id == product_id))
+            if category_id is None:
+                return None
+            products = db.session.execute(
+                select(Product)
+                .where(Product.category_id == category_id, Product.id != product_id)
+                .order_by(Product.id)
+                .limit(limit)
+            ).scalars().all()
+        return [serialize_product(p) for p in products]
+
+    return catalog_cache.get_or_set(f'related:{product_id}:{limit}', load)
@@ -0,0 +1,127 @@
+"""
+Roteamento de leituras para réplicas do banco
+
+Cada URL de DATABASE_REPLICA_URLS vira um bind do Flask-SQLAlchemy
+(replica_0, replica_1...). As views marcadas com @replica_reads (catálogo e
+histórico de pedidos) e os blocos read_from_replica() leem de uma réplica
+sorteada por requisição. O resto da aplicação, e qualquer transação que
+escreva, continua no primário (RoutingSession em models.py).
+
+Leia-suas-escritas: depois de alterar o carrinho ou fazer um pedido, o
+usuário fica fixado no primário por REPLICA_STICKY_SECONDS, tempo que deve
+cobrir o atraso de replicação. Alterações no catálogo fixam as leituras do
+catálogo da mesma forma. As marcas ficam em REPLICA_STICKY_URL: em memória
+valem só para o processo; com Redis valem para todos os workers.
+"""
+
+import random
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, session
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from models import db
+from .cache import create_backend
+
+REPLICA_BIND_PREFIX = 'replica_'
+PIN_MAX_ENTRIES = 10000
+# Pinned when the catalog changes, so cache misses refill from the primary
+CATALOG_PIN = 'catalog'
+
+
+def replica_binds(urls):
+    """Binds do Flask-SQLAlchemy para as URLs das réplicas"""
+    return {f'{REPLICA_BIND_PREFIX}{index}': url for index, url in enumerate(urls)}
+
+
+def _request_user_id():
+    # Session cookie for the HTML pages, JWT for the API
+    if 'user_id' in session:
+        return session['user_id']
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        return None
+
+
+class ReplicaRouting:
+    """Réplicas de leitura com fixação no primário após escritas do usuário"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registra as réplicas como binds; deve ser chamado antes de db.init_app"""
+        binds = replica_binds(app.config.get('DATABASE_REPLICA_URLS') or [])
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), **binds}
+        app.extensions['replica_routing'] = {
+            'binds': list(binds),
+            'sticky_seconds': app.config.get('REPLICA_STICKY_SECONDS', 10),
+            'pins': create_backend(app.config.get('REPLICA_STICKY_URL', 'memory://'),
+                                   PIN_MAX_ENTRIES, prefix='replica-pin:'),
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['replica_routing']
+
+    @property
+    def enabled(self):
+        return bool(self._state['binds'])
+
+    def pin_to_primary(self, key):
+        """Envia ao primário as leituras de key (um user_id ou CATALOG_PIN) por REPLICA_STICKY_SECONDS"""
+        state = self._state
+        if state['binds'] and state['sticky_seconds'] > 0:
+            state['pins'].set(str(key), True, state['sticky_seconds'])
+
+    def is_pinned(self, key):
+        return self._state['pins'].get(str(key)) is not None
+
+    def choose_replica(self, user_id=None):
+        """Engine de uma réplica, ou None quando a leitura deve ir ao primário"""
+        binds = self._state['binds']
+        if not binds or self.is_pinned(CATALOG_PIN):
+            return None
+        if user_id is not None and self.is_pinned(user_id):
+            return None
+        return db.engines[random.choice(binds)]
+
+    @contextmanager
+    def read_from_replica(self, user_id=None):
+        """Dentro do bloco, as leituras de db.session vão para uma réplica
+
+        Sem réplicas configuradas, ou com o usuário fixado no primário, o
+        bloco não muda nada. Escritas sempre vão para o primário.
+        """
+        db_session = db.session()
+        previous = db_session.info.get('replica')
+        replica = self.choose_replica(user_id)
+        if replica is not None:
+            db_session.info['replica'] = replica
+        try:
+            yield replica
+        finally:
+            if previous is None:
+                db_session.info.pop('replica', None)
+            else:
+                db_session.info['replica'] = previous
+
+
+replica_routing = ReplicaRouting()
+
+
+def replica_reads(view):
+    """Decorator de views somente leitura: as consultas vão para uma réplica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not replica_routing.enabled:
+            return view(*args, **kwargs)
+        with replica_routing.read_from_replica(_request_user_id()):
+            return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,278 @@
+"""
+Reservas de estoque com validade para as linhas do carrinho
+
+Adicionar ao carrinho segura a quantidade da linha por RESERVATION_TTL_SECONDS
+(renovado a cada alteração do carrinho). O disponível para venda é
+stock - reservas vigentes, somadas direto do índice
+(product_id, expires_at, quantity), sem tocar na linha do produto.
+
+O checkout converte as reservas do carrinho (expires_at NULL, order_id
+preenchido) em vez de baixar o estoque com UPDATEs na linha do produto, que
+em lançamentos com estoque pequeno viravam o ponto de disputa. As reservas
+convertidas continuam contando no disponível até o varredor aplicá-las a
+Product.stock em lote; o mesmo varredor apaga as reservas vencidas, que já
+não contam no disponível mesmo antes de apagadas.
+"""
+
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import DateTime, and_, delete, func, literal, or_, select, update
+from sqlalchemy.orm import aliased
+
+from models import db, CartItem, Product, StockReservation
+from .upsert import upsert_insert
+
+# Namespace of the PostgreSQL advisory locks taken per product while holding
+HOLD_LOCK_NAMESPACE = 7301
+
+
+class InsufficientStockError(Exception):
+    """Não há disponível para venda para uma ou mais linhas do carrinho"""
+
+    def __init__(self, product_ids):
+        super().__init__('Insufficient stock')
+        self.product_ids = product_ids
+
+
+def _counted(reservation, now):
+    # Live holds plus converted ones not yet applied to Product.stock
+    return or_(reservation.expires_at > now, reservation.expires_at.is_(None))
+
+
+def _lock_products(session, product_ids):
+    # SQLite already serializes writers; on PostgreSQL two carts could
+    # otherwise both see the last unit as available
+    if session.get_bind().dialect.name == 'postgresql':
+        for product_id in sorted(product_ids):
+            session.execute(select(func.pg_advisory_xact_lock(HOLD_LOCK_NAMESPACE, product_id)))
+
+
+def hold_cart_lines(session, cart_id, product_ids):
+    """Reserva a quantidade atual das linhas de product_ids no carrinho (sem commit)
+
+    Cada linha fica reservada se a quantidade couber no disponível ou não
+    passar da reserva vigente que já tinha. As demais reservas vigentes do
+    carrinho são renovadas. Levanta InsufficientStockError com as linhas que
+    ficaram sem reserva; quem chama deve desfazer a transação.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=current_app.config.get('RESERVATION_TTL_SECONDS', 900))
+    _lock_products(session, product_ids)
+
+    others = aliased(StockReservation)
+    held_by_others = (
+        select(func.coalesce(func.sum(others.quantity), 0))
+        .where(others.product_id == CartItem.product_id, others.cart_id != CartItem.cart_id, _counted(others, now))
+        .scalar_subquery()
+    )
+    own = aliased(StockReservation)
+    insert = upsert_insert(session)
+    reservation = StockReservation.__table__
+    stmt = insert(reservation).from_select(
+        ['cart_id', 'product_id', 'quantity', 'expires_at', 'created_at'],
+        select(CartItem.cart_id, CartItem.product_id, CartItem.quantity,
+               literal(expires_at, DateTime), literal(now, DateTime))
+        .join(Product, Product.id == CartItem.product_id)
+        .outerjoin(own, and_(own.cart_id == CartItem.cart_id, own.product_id == CartItem.product_id,
+                             own.expires_at > now))
+        .where(CartItem.cart_id == cart_id, CartItem.product_id.in_(product_ids))
+        .where(or_(CartItem.quantity <= func.coalesce(own.quantity, 0),
+                   Product.stock - held_by_others >= CartItem.quantity))
+    )
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=['cart_id', 'product_id'],
+        set_={'quantity': stmt.excluded.quantity, 'expires_at': stmt.excluded.expires_at}
+    ))
+    session.execute(
+        update(StockReservation)
+        .where(StockReservation.cart_id == cart_id, StockReservation.expires_at > now)
+        .values(expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+
+    missing = session.execute(
+        select(CartItem.product_id)
+        .outerjoin(StockReservation, and_(StockReservation.cart_id == CartItem.cart_id,
+                                          StockReservation.product_id == CartItem.product_id))
+        .where(CartItem.cart_id == cart_id, CartItem.product_id.in_(product_ids))
+        .where(or_(StockReservation.id.is_(None), StockReservation.quantity < CartItem.quantity,
+                   StockReservation.expires_at <= now))
+    ).scalars().all()
+    if missing:
+        raise InsufficientStockError(sorted(missing))
+
+
+def release_orphan_holds(session, cart_id):
+    """Libera as reservas de produtos que saíram do carrinho (sem commit)"""
+    session.execute(
+        delete(StockReservation)
+        .where(StockReservation.cart_id == cart_id, StockReservation.expires_at.is_not(None),
+               StockReservation.product_id.not_in(select(CartItem.product_id).where(CartItem.cart_id == cart_id)))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def convert_cart_holds(session, cart_id, order_id):
+    """Converte as reservas vigentes do carrinho nas do pedido (sem commit)
+
+    Retorna [(product_id, quantidade)] do que foi convertido: é exatamente o
+    que o varredor vai baixar do estoque.
+    """
+    return session.execute(
+        update(StockReservation)
+        .where(StockReservation.cart_id == cart_id, StockReservation.expires_at > datetime.utcnow())
+        .values(expires_at=None, order_id=order_id)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def available_to_sell(product_ids, session=None):
+    """Disponível para venda de cada produto: {product_id: quantidade}"""
+    if not product_ids:
+        return {}
+    now = datetime.utcnow()
+    held = (
+        select(StockReservation.product_id, func.sum(StockReservation.quantity).label('quantity'))
+        .where(StockReservation.product_id.in_(product_ids), _counted(StockReservation, now))
+        .group_by(StockReservation.product_id)
+        .subquery()
+    )
+    stmt = (
+        select(Product.id, Product.stock - func.coalesce(held.c.quantity, 0))
+        .outerjoin(held, held.c.product_id == Product.id)
+        .where(Product.id.in_(product_ids))
+    )
+    return {product_id: max(0, available) for product_id, available in (session or db.session).execute(stmt)}
+
+
+def sweep_reservations(batch_size=500, session=None):
+    """Apaga reservas vencidas e aplica as convertidas a Product.stock, em lotes
+
+    Cada lote é uma transação. O DELETE ... RETURNING garante que, com
+    vários varredores ao mesmo tempo, cada reserva convertida seja aplicada
+    uma única vez. Retorna um dict com as contagens.
+    """
+    session = session or db.session
+    stats = {'expired': 0, 'applied': 0}
+
+    while True:
+        now = datetime.utcnow()
+        batch = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+        )
+        try:
+            deleted = session.execute(
+                delete(StockReservation).where(StockReservation.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        stats['expired'] += deleted
+        if deleted < batch_size:
+            break
+
+    while True:
+        batch = select(StockReservation.id).where(StockReservation.expires_at.is_(None)).limit(batch_size)
+        try:
+            rows = session.execute(
+                delete(StockReservation).where(StockReservation.id.in_(batch))
+                .returning(StockReservation.product_id, StockReservation.quantity)
+                .execution_options(synchronize_session=False)
+            ).all()
+            sold = {}
+            for product_id, quantity in rows:
+                sold[product_id] = sold.get(product_id, 0) + quantity
+            # Id order keeps concurrent sweepers and checkouts from deadlocking
+            for product_id in sorted(sold):
+                session.execute(
+                    update(Product).where(Product.id == product_id)
+                    .values(stock=Product.stock - sold[product_id])
+                    .execution_options(synchronize_session=False)
+                )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        stats['applied'] += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return stats
+
+
+class ReservationSweeper:
+    """Thread que roda sweep_reservations a cada RESERVATION_SWEEP_INTERVAL segundos
+
+    Com intervalo > 0, a thread sobe na primeira requisição de cada processo
+    (flask run, run_flask.py, workers do gunicorn) ou no start() explícito
+    (lifespan do ASGI); comandos da CLI e scripts não a iniciam. Com 0, rode
+    flask sweep-reservations pelo cron.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['reservation_sweeper'] = {
+            'interval': app.config.get('RESERVATION_SWEEP_INTERVAL', 60),
+            'batch_size': app.config.get('RESERVATION_SWEEP_BATCH', 500),
+            'thread': None,
+            'pid': None,
+            'lock': threading.Lock(),
+            'stop': threading.Event(),
+        }
+        if app.extensions['reservation_sweeper']['interval'] > 0:
+            app.before_request(lambda: self.start(app))
+
+    def start(self, app):
+        """Inicia a thread, uma por processo; chamadas repetidas não fazem nada"""
+        state = app.extensions['reservation_sweeper']
+        # A thread recorded before a fork (gunicorn preload) does not exist in the child
+        if state['interval'] <= 0 or (state['thread'] is not None and state['pid'] == os.getpid()):
+            return
+        with state['lock']:
+            if state['thread'] is not None and state['pid'] == os.getpid():
+                return
+            state['stop'].clear()
+            state['pid'] = os.getpid()
+            state['thread'] = threading.Thread(target=self._run, args=(app, state), name='reservation-sweeper',
+                                               daemon=True)
+            state['thread'].start()
+
+    def stop(self, app):
+        state = app.extensions['reservation_sweeper']
+        state['stop'].set()
+        if state['thread'] is not None and state['pid'] == os.getpid():
+            state['thread'].join()
+        state['thread'] = None
+
+    def _run(self, app, state):
+        # Jitter keeps the workers of one server from sweeping in lockstep
+        while not state['stop'].wait(state['interval'] * random.uniform(0.8, 1.2)):
+            with app.app_context():
+                try:
+                    stats = sweep_reservations(state['batch_size'])
+                    if stats['expired'] or stats['applied']:
+                        app.logger.info('Reservas: %(expired)d vencidas liberadas, %(applied)d aplicadas ao estoque',
+                                        stats)
+                except Exception:
+                    app.logger.exception('Falha ao varrer reservas de estoque')
+                finally:
+                    db.session.remove()
+
+
+reservation_sweeper = ReservationSweeper()
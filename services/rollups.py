@@ -0,0 +1,217 @@
+"""
+Rollups diários de vendas: total, por produto e por categoria
+
+Os rollups são mantidos pelo job flask rollup-sales (pelo cron), e não pelo
+checkout: somar cada pedido na transação do checkout faria todos os
+checkouts disputarem a mesma linha de sales_daily. O job percorre em blocos
+só os pedidos acima da marca d'água, soma os que ainda não entraram e os
+marca em Order.rolled_up_at; cada pedido entra uma única vez. Pedidos mais
+novos que SETTLE_SECONDS ficam para a próxima execução, para que um checkout
+ainda não confirmado não fique abaixo da marca d'água.
+
+Os dias são em UTC (a data de Order.created_at). /api/admin/analytics lê
+apenas os rollups, sem varrer order e order_item.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, cast, delete, desc, func, select, update
+
+from models import (
+    db, Category, Order, OrderItem, Product, RollupWatermark, SalesDaily, SalesDailyCategory, SalesDailyProduct
+)
+from .upsert import upsert_insert
+
+WATERMARK = 'sales'
+ROLLUP_MEASURES = ('revenue', 'units', 'orders')
+DEFAULT_ANALYTICS_DAYS = 30
+# Longer than any checkout transaction: ids are assigned before commit
+SETTLE_SECONDS = 60
+
+
+def _day(session):
+    # CAST(... AS DATE) on SQLite keeps only the year, as a number
+    if session.get_bind().dialect.name == 'sqlite':
+        return func.date(Order.created_at)
+    return cast(Order.created_at, Date)
+
+
+def _accumulate(session, model, keys, rows):
+    insert = upsert_insert(session)
+    table = model.__table__
+    stmt = insert(table).from_select([*keys, *ROLLUP_MEASURES], rows)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: table.c[name] + stmt.excluded[name] for name in ROLLUP_MEASURES}
+    ))
+
+
+def _apply(session, orders):
+    # orders: conditions on Order selecting what is added to the rollups
+    day = _day(session)
+    measures = (
+        func.sum(OrderItem.price * OrderItem.quantity),
+        func.sum(OrderItem.quantity),
+        func.count(OrderItem.order_id.distinct()),
+    )
+    lines = select().select_from(OrderItem).join(Order, Order.id == OrderItem.order_id).where(*orders)
+
+    _accumulate(session, SalesDaily, ['day'], lines.add_columns(day, *measures).group_by(day))
+    _accumulate(session, SalesDailyProduct, ['day', 'product_id'],
+                lines.add_columns(day, OrderItem.product_id, *measures).group_by(day, OrderItem.product_id))
+    _accumulate(session, SalesDailyCategory, ['day', 'category_id'],
+                lines.join(Product, Product.id == OrderItem.product_id)
+                .add_columns(day, Product.category_id, *measures).group_by(day, Product.category_id))
+
+
+def _set_watermark(session, last_order_id=None):
+    # None only creates the row; a number also moves it
+    stmt = upsert_insert(session)(RollupWatermark).values(
+        name=WATERMARK, last_order_id=last_order_id or 0, updated_at=datetime.utcnow()
+    )
+    if last_order_id is None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=['name'])
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=['name'], set_={
+            'last_order_id': stmt.excluded.last_order_id, 'updated_at': stmt.excluded.updated_at,
+        })
+    session.execute(stmt)
+
+
+def catch_up_rollups(chunk_size=1000, session=None, settle_seconds=SETTLE_SECONDS):
+    """Soma aos rollups os pedidos acima da marca d'água que ainda não entraram
+
+    Cada bloco de chunk_size pedidos é uma transação que também avança a
+    marca d'água; com dois jobs ao mesmo tempo, o segundo para no primeiro
+    bloco disputado. Pedidos criados há menos de settle_seconds ficam para a
+    próxima execução. Retorna um dict com as contagens.
+    """
+    session = session or db.session
+    settled = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    stats = {'orders': 0, 'chunks': 0}
+    try:
+        _set_watermark(session)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    while True:
+        last = session.scalar(select(RollupWatermark.last_order_id).where(RollupWatermark.name == WATERMARK))
+        ids = session.execute(
+            select(Order.id).where(Order.id > last, Order.created_at <= settled).order_by(Order.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            session.rollback()
+            break
+
+        now = datetime.utcnow()
+        pending = [Order.id > last, Order.id <= ids[-1], Order.rolled_up_at.is_(None)]
+        try:
+            # Claim the chunk first: a concurrent job waits here, then finds the watermark moved
+            claimed = session.execute(
+                update(RollupWatermark)
+                .where(RollupWatermark.name == WATERMARK, RollupWatermark.last_order_id == last)
+                .values(last_order_id=ids[-1], updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if claimed != 1:
+                session.rollback()
+                break
+            _apply(session, pending)
+            stats['orders'] += session.execute(
+                update(Order).where(*pending).values(rolled_up_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        stats['chunks'] += 1
+        if len(ids) < chunk_size:
+            break
+
+    return stats
+
+
+def rebuild_rollups(chunk_size=1000, session=None):
+    """Refaz os rollups do zero: esvazia as tabelas e soma todos os pedidos em blocos
+
+    Pedidos feitos durante a reconstrução entram na próxima execução do
+    job, como os demais.
+    """
+    session = session or db.session
+    try:
+        for model in (SalesDaily, SalesDailyProduct, SalesDailyCategory):
+            session.execute(delete(model))
+        session.execute(
+            update(Order).where(Order.rolled_up_at.is_not(None)).values(rolled_up_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        _set_watermark(session, 0)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return catch_up_rollups(chunk_size, session)
+
+
+def _measures(model):
+    return (func.sum(model.revenue).label('revenue'), func.sum(model.units).label('units'),
+            func.sum(model.orders).label('orders'))
+
+
+def _serialize_measures(row):
+    return {'revenue': round(row.revenue or 0, 2), 'units': row.units or 0, 'orders': row.orders or 0}
+
+
+def sales_analytics(start_at=None, end_before=None, limit=10, session=None):
+    """Vendas por dia, por categoria e produtos mais vendidos, lidas só dos rollups
+
+    Sem período, os últimos DEFAULT_ANALYTICS_DAYS dias. Os pedidos de uma
+    categoria ou produto são os pedidos distintos em que aparecem.
+    """
+    session = session or db.session
+    end = end_before.date() if end_before else datetime.utcnow().date() + timedelta(days=1)
+    start = start_at.date() if start_at else end - timedelta(days=DEFAULT_ANALYTICS_DAYS)
+
+    days = session.execute(
+        select(SalesDaily).where(SalesDaily.day >= start, SalesDaily.day < end).order_by(SalesDaily.day)
+    ).scalars().all()
+    categories = session.execute(
+        select(SalesDailyCategory.category_id, Category.name, *_measures(SalesDailyCategory))
+        .join(Category, Category.id == SalesDailyCategory.category_id)
+        .where(SalesDailyCategory.day >= start, SalesDailyCategory.day < end)
+        .group_by(SalesDailyCategory.category_id, Category.name)
+        .order_by(desc('revenue'))
+    ).all()
+    top = (
+        select(SalesDailyProduct.product_id, *_measures(SalesDailyProduct))
+        .where(SalesDailyProduct.day >= start, SalesDailyProduct.day < end)
+        .group_by(SalesDailyProduct.product_id)
+        .order_by(desc('revenue'), SalesDailyProduct.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    products = session.execute(
+        select(top, Product.name).join(Product, Product.id == top.c.product_id)
+        .order_by(top.c.revenue.desc(), top.c.product_id)
+    ).all()
+    watermark = session.get(RollupWatermark, WATERMARK)
+
+    return {
+        'start': start.isoformat(),
+        'end': (end - timedelta(days=1)).isoformat(),
+        'totals': _serialize_measures(session.execute(
+            select(*_measures(SalesDaily)).where(SalesDaily.day >= start, SalesDaily.day < end)
+        ).one()),
+        'days': [{'day': row.day.isoformat(), **_serialize_measures(row)} for row in days],
+        'categories': [{'category_id': row.category_id, 'name': row.name, **_serialize_measures(row)}
+                       for row in categories],
+        'top_products': [{'product_id': row.product_id, 'name': row.name, **_serialize_measures(row)}
+                         for row in products],
+        'watermark': {
+            'last_order_id': watermark.last_order_id if watermark else 0,
+            'updated_at': watermark.updated_at.isoformat() if watermark else None,
+        },
+    }
@@ -0,0 +1,73 @@
+"""
+Busca textual de produtos (FTS5 no SQLite, tsvector no PostgreSQL)
+"""
+
+import re
+
+from sqlalchemy import text
+
+from models import db, Product
+from .cache import catalog_cache
+from .catalog import serialize_product
+
+MAX_SEARCH_TERMS = 8
+
+SEARCH_SQL = {
+    'sqlite': """
+        SELECT p.id, p.name, p.description, p.price, p.image_url, p.category_id
+        FROM product_fts
+        JOIN product p ON p.id = product_fts.rowid
+        WHERE product_fts MATCH :query {category_filter}
+        ORDER BY bm25(product_fts, 10.0, 1.0), p.id
+        LIMIT :limit
+    """,
+    'postgresql': """
+        SELECT p.id, p.name, p.description, p.price, p.image_url, p.category_id
+        FROM product p, to_tsquery('portuguese', :query) query
+        WHERE p.search_vector @@ query {category_filter}
+        ORDER BY ts_rank_cd(p.search_vector, query) DESC, p.id
+        LIMIT :limit
+    """,
+}
+
+
+def search_terms(q):
+    """Extrai os termos da consulta, descartando operadores e pontuação"""
+    return re.findall(r'\w+', q or '')[:MAX_SEARCH_TERMS]
+
+
+def _build_query(dialect, terms):
+    # Every term must match, and the last one also matches as a prefix
+    # so results show up while the user is still typing
+    if dialect == 'sqlite':
+        return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+    return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+
+def search_products(q, category_id=None, limit=20):
+    """Busca produtos por nome e descrição, ordenados por relevância"""
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    def load():
+        dialect = db.session.get_bind().dialect.name
+        if dialect not in SEARCH_SQL:
+            # No inverted index on this backend; keep search usable anyway
+            pattern = f'%{" ".join(terms)}%'
+            query = Product.query.filter(Product.name.ilike(pattern) | Product.description.ilike(pattern))
+            if category_id:
+                query = query.filter_by(category_id=category_id)
+            return [serialize_product(p) for p in query.order_by(Product.id).limit(limit)]
+
+        params = {'query': _build_query(dialect, terms), 'limit': limit}
+        category_filter = ''
+        if category_id:
+            category_filter = 'AND p.category_id = :category_id'
+            params['category_id'] = category_id
+
+        sql = text(SEARCH_SQL[dialect].format(category_filter=category_filter))
+        return [dict(row) for row in db.session.execute(sql, params).mappings()]
+
+    key = f'search:{" ".join(terms).lower()}:{category_id or "all"}:{limit}'
+    return catalog_cache.get_or_set(key, load)
@@ -0,0 +1,74 @@
+"""
+Modo de alta concorrência do SQLite para implantações em um único nó
+
+Com vários workers do gunicorn sobre o mesmo arquivo, os pragmas padrão
+(journal em modo rollback, sem busy_timeout) fazem leitores esperarem
+escritores e rajadas de checkout falharem com "database is locked". Com
+SQLITE_TUNING ligado, cada conexão nova recebe:
+
+- journal_mode=WAL: leitores não bloqueiam escritores nem vice-versa;
+- synchronous=NORMAL: seguro em WAL, sem fsync a cada commit;
+- busy_timeout: escritores concorrentes esperam a vez em vez de falhar;
+- mmap_size, cache_size e temp_store=MEMORY;
+- BEGIN IMMEDIATE nas transações de escrita.
+
+O driver sqlite3 só abre transação antes do primeiro INSERT/UPDATE/DELETE,
+então leituras continuam fora de transação e apenas escritas pegam a trava
+de escrita logo no BEGIN. Sem isso, uma transação DEFERRED que já leu e
+tenta escrever pode receber SQLITE_BUSY sem que o busy_timeout ajude.
+"""
+
+from sqlalchemy import event
+
+from models import db
+
+
+def sqlite_pragmas(config):
+    """Pragmas aplicados a cada conexão, na ordem"""
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 15000)),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        # Negative values are KiB rather than pages
+        ('cache_size', -config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+class SQLiteTuning:
+    """Aplica os pragmas e o BEGIN IMMEDIATE às engines SQLite da aplicação"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['sqlite_tuning'] = {
+            'enabled': app.config.get('SQLITE_TUNING', False),
+            'pragmas': sqlite_pragmas(app.config),
+        }
+        with app.app_context():
+            for engine in db.engines.values():
+                self.register(app, engine)
+
+    def register(self, app, engine):
+        """Instala o evento connect em uma engine (também usado pela engine assíncrona)"""
+        state = app.extensions['sqlite_tuning']
+        if not state['enabled'] or engine.dialect.name != 'sqlite':
+            return
+
+        pragmas = state['pragmas']
+
+        @event.listens_for(engine, 'connect')
+        def tune_connection(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas:
+                    cursor.execute(f'PRAGMA {name}={value}')
+            finally:
+                cursor.close()
+            dbapi_connection.isolation_level = 'IMMEDIATE'
+
+
+sqlite_tuning = SQLiteTuning()
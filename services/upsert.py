@@ -0,0 +1,18 @@
+"""
+INSERT ... ON CONFLICT para os bancos suportados (SQLite e PostgreSQL)
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def upsert_insert(session):
+    """Retorna o construtor de insert com on_conflict_* do banco da sessão"""
+    dialect = session.get_bind().dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        raise RuntimeError(f'INSERT ... ON CONFLICT não suportado para o banco {dialect}')
+    return UPSERT_DIALECTS[dialect]
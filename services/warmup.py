@@ -0,0 +1,40 @@
+"""
+Aquecimento de um worker antes de receber tráfego
+
+Depois de um deploy, as primeiras requisições de cada worker pagavam a
+compilação dos templates Jinja, a abertura da conexão com o banco e as
+consultas do catálogo com o cache vazio, o que aparecia como pico de p99.
+"""
+
+import time
+
+from sqlalchemy import text
+
+from models import db
+from .catalog import featured_products, list_categories, page_products
+
+
+def warm_up(app):
+    """Compila os templates, abre uma conexão do pool e popula o cache do catálogo
+
+    Popula as mesmas chaves usadas pela página inicial e pela primeira página
+    de /products de cada categoria. Retorna um dict com o que foi feito.
+    """
+    started = time.perf_counter()
+    with app.app_context():
+        templates = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+        for name in templates:
+            app.jinja_env.get_template(name)
+
+        db.session.execute(text('SELECT 1'))
+        categories = list_categories()
+        featured_products()
+        for category_id in [None] + [category['id'] for category in categories]:
+            page_products(category_id)
+        db.session.remove()
+
+    return {
+        'templates': len(templates),
+        'categories': len(categories),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
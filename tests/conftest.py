@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Category, Product, User
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """make_app(**config) cria outra aplicação sobre o mesmo banco de teste"""
+    def make_app(**overrides):
+        # A file database, so threads in the concurrency tests share it
+        return create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/test.db',
+            'SQLITE_TUNING': True,
+            'METRICS_ENABLED': False,
+            'RESERVATION_SWEEP_INTERVAL': 0,
+            **overrides,
+        })
+
+    return make_app
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def seed(app):
+    """seed(products=1, stock=10, users=1) cria uma categoria, produtos 1..n e usuários 1..n"""
+    def seed(products=1, stock=10, users=1):
+        db.session.add(Category(name='Whiskies'))
+        db.session.flush()
+        db.session.execute(insert(Product), [
+            {'name': f'Produto {i}', 'price': 10.0 + i, 'stock': stock, 'category_id': 1}
+            for i in range(1, products + 1)
+        ])
+        db.session.execute(insert(User), [
+            {'email': f'user{i}@test', 'password': '-'} for i in range(1, users + 1)
+        ])
+        db.session.commit()
+
+    return seed
+
+
+@pytest.fixture
+def auth(app):
+    """auth(user_id) retorna o cabeçalho Authorization com um JWT do usuário"""
+    def auth(user_id):
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+    return auth
+
+
+@pytest.fixture
+def concurrently(app):
+    """concurrently(count, target) chama target(i) em count threads liberadas juntas
+
+    Retorna {i: resultado ou exceção}, com i de 1 a count.
+    """
+    def concurrently(count, target):
+        barrier = threading.Barrier(count)
+        results = {}
+
+        def worker(i):
+            with app.app_context():
+                barrier.wait()
+                try:
+                    results[i] = target(i)
+                except Exception as e:
+                    results[i] = e
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, count + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    return concurrently
@@ -0,0 +1,40 @@
+import gzip
+import re
+
+from flask import render_template_string
+
+from services import build_assets
+
+
+def test_built_assets_are_fingerprinted_and_immutable(app, make_app, tmp_path):
+    stats = build_assets(app.static_folder, tmp_path / 'dist')
+    hashed = stats['manifest']['css/style.css']
+    assert re.fullmatch(r'css/style\.[0-9a-f]{12}\.css', hashed)
+
+    built = make_app(ASSET_BUILD_DIR=str(tmp_path / 'dist'))
+    with built.test_request_context():
+        assert render_template_string("{{ asset_url('css/style.css') }}") == f'/assets/{hashed}'
+    client = built.test_client()
+
+    response = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.cache_control.public and response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 3600
+    assert 'Accept-Encoding' in response.headers['Vary']
+    with open(f'{app.static_folder}/css/style.css', 'rb') as f:
+        assert gzip.decompress(response.data) == f.read()
+
+    preferred = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip, br'})
+    assert preferred.headers['Content-Encoding'] == 'br'
+
+    plain = client.get(f'/assets/{hashed}')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.mimetype == 'text/css'
+    assert client.get('/assets/manifest.json').status_code == 404
+    assert client.get('/assets/../config/settings.py').status_code == 404
+
+
+def test_without_a_build_assets_come_from_static(make_app, tmp_path):
+    with make_app(ASSET_BUILD_DIR=str(tmp_path / 'missing')).test_request_context():
+        assert render_template_string("{{ asset_url('css/style.css') }}") == '/static/css/style.css'
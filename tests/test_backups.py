@@ -0,0 +1,48 @@
+import gzip
+import os
+import sqlite3
+
+from services import apply_retention, backup_database
+
+
+def test_sqlite_backup_is_compressed_and_restorable(app, seed, tmp_path):
+    seed(products=3)
+    backups = tmp_path / 'backups'
+
+    stats = backup_database(str(backups), 'gzip', keep=5, max_age_days=0)
+
+    assert stats['integrity'] == 'ok'
+    assert os.listdir(backups) == [os.path.basename(stats['path'])]
+    restored = tmp_path / 'restored.db'
+    restored.write_bytes(gzip.decompress(open(stats['path'], 'rb').read()))
+    with sqlite3.connect(restored) as connection:
+        assert connection.execute('SELECT count(*) FROM product').fetchone() == (3,)
+
+
+def test_uncompressed_backup_leaves_no_temporary_copy(app, seed, tmp_path):
+    seed()
+    backups = tmp_path / 'backups'
+
+    stats = backup_database(str(backups), 'none', keep=5, max_age_days=0)
+
+    assert stats['path'].endswith('.db')
+    assert os.listdir(backups) == [os.path.basename(stats['path'])]
+    with sqlite3.connect(stats['path']) as connection:
+        assert connection.execute('PRAGMA integrity_check').fetchone() == ('ok',)
+
+
+def test_retention_only_prunes_backups_of_the_same_database(tmp_path):
+    names = [f'backup_test_2026010{day}_120000.db.gz' for day in range(1, 5)] + [
+        'backup_other_20260101_120000.db.gz',
+        'backup_test_shop_20260101_120000.db.gz',
+        'notes.txt',
+    ]
+    for name in names:
+        (tmp_path / name).write_bytes(b'')
+
+    removed = apply_retention(str(tmp_path), 'test', keep=2)
+
+    assert sorted(os.path.basename(path) for path in removed) == [
+        'backup_test_20260101_120000.db.gz', 'backup_test_20260102_120000.db.gz',
+    ]
+    assert sorted(os.listdir(tmp_path)) == sorted(set(names) - {os.path.basename(p) for p in removed})
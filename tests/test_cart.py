@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import event, func, select
+
+from models import db, Cart, CartItem
+from services import add_cart_item, apply_cart_operations, load_active_cart
+
+
+@pytest.mark.parametrize('items', [3, 40])
+def test_load_active_cart_is_one_statement(app, seed, items):
+    seed(products=items)
+    for product_id in range(1, items + 1):
+        add_cart_item(1, product_id, 2)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        cart_id, lines, total = load_active_cart(1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert cart_id is not None
+    assert [product.id for _, product in lines] == list(range(1, items + 1))
+    assert total == pytest.approx(sum(2 * (10.0 + i) for i in range(1, items + 1)))
+
+
+def test_load_active_cart_without_cart(app, seed):
+    seed()
+    assert load_active_cart(1) == (None, [], 0)
+
+
+def test_concurrent_adds_keep_one_line_per_product(app, seed, concurrently):
+    seed(products=2, stock=1_000_000)
+    threads, adds = 8, 10
+
+    def add(worker):
+        # Single adds and batches race on the same lines of a cart that does not exist yet
+        for i in range(adds):
+            if (worker + i) % 2:
+                add_cart_item(1, 1, 1)
+            else:
+                apply_cart_operations(1, [
+                    {'op': 'add', 'product_id': 1, 'quantity': 2},
+                    {'op': 'add', 'product_id': 2, 'quantity': 1},
+                ])
+
+    results = concurrently(threads, add)
+
+    assert [r for r in results.values() if r is not None] == []
+    assert db.session.scalar(select(func.count()).where(Cart.user_id == 1, Cart.is_active == True)) == 1
+    lines = db.session.execute(
+        select(CartItem.product_id, func.count(), func.sum(CartItem.quantity))
+        .group_by(CartItem.product_id).order_by(CartItem.product_id)
+    ).all()
+    # Half of the calls add 1 unit, the other half 2 units plus 1 of product 2
+    calls = threads * adds
+    assert [tuple(line) for line in lines] == [(1, 1, calls // 2 * 3), (2, 1, calls // 2)]
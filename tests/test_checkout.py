@@ -0,0 +1,51 @@
+from sqlalchemy import delete, func, insert, select, update
+
+from models import db, Cart, CartItem, Order, OrderItem, Product, StockReservation
+from services import OutOfStockError, add_cart_item, checkout, place_order, sweep_reservations
+
+
+def test_concurrent_checkouts_never_oversell(app, seed, concurrently):
+    buyers, stock = 20, 3
+    seed(stock=stock, users=buyers)
+    # Lines without holds (as if they had expired): every checkout races to reserve
+    db.session.execute(insert(Cart), [{'user_id': i, 'is_active': True} for i in range(1, buyers + 1)])
+    db.session.execute(insert(CartItem), [{'cart_id': i, 'product_id': 1, 'quantity': 1}
+                                          for i in range(1, buyers + 1)])
+    db.session.commit()
+
+    results = concurrently(buyers, lambda i: place_order(i, 'Rua Teste, 1', 'pix'))
+
+    orders = [r for r in results.values() if isinstance(r, int)]
+    rejected = [r for r in results.values() if isinstance(r, OutOfStockError)]
+    assert len(orders) == stock
+    assert len(rejected) == buyers - stock
+    assert db.session.scalar(select(func.sum(OrderItem.quantity))) == stock
+
+    stats = sweep_reservations()
+    assert stats['applied'] == stock
+    assert db.session.get(Product, 1).stock == 0
+    assert db.session.scalar(select(func.count()).select_from(StockReservation)) == 0
+    assert db.session.scalar(select(func.count()).select_from(Order)) == stock
+
+
+def test_order_matches_holds_when_cart_changes_during_checkout(app, seed, monkeypatch):
+    seed(products=3, stock=10)
+    add_cart_item(1, 1, 2)
+    add_cart_item(1, 2, 1)
+    hold = checkout.hold_cart_lines
+
+    def cart_changes_then_hold(session, cart_id, product_ids):
+        # Another request updates the cart after place_order read it
+        session.execute(update(CartItem).where(CartItem.product_id == 1).values(quantity=5))
+        session.execute(delete(CartItem).where(CartItem.product_id == 2))
+        return hold(session, cart_id, product_ids)
+
+    monkeypatch.setattr(checkout, 'hold_cart_lines', cart_changes_then_hold)
+    order_id = place_order(1, 'Rua Teste, 1', 'pix')
+
+    items = db.session.execute(select(OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+                               .where(OrderItem.order_id == order_id)).all()
+    assert [tuple(item) for item in items] == [(1, 5, 11.0)]
+    assert db.session.get(Order, order_id).total_amount == 55.0
+    sweep_reservations()
+    assert [db.session.get(Product, i).stock for i in (1, 2)] == [5, 10]
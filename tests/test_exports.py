@@ -0,0 +1,62 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from models import db, Order, User
+from services import add_cart_item, exports, place_order
+
+
+@pytest.fixture
+def orders(app, seed):
+    seed(products=3, users=3, stock=100)
+    db.session.get(User, 1).is_admin = True
+    db.session.commit()
+    for user_id, lines in ((2, {1: 2, 2: 1}), (3, {3: 4})):
+        for product_id, quantity in lines.items():
+            add_cart_item(user_id, product_id, quantity)
+        place_order(user_id, 'Rua Teste, 1', 'pix')
+    db.session.get(Order, 2).status = 'shipped'
+    db.session.commit()
+
+
+def test_csv_export_streams_one_row_per_item(app, orders, auth):
+    response = app.test_client().get('/api/admin/orders/export', headers=auth(1))
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'filename="orders.csv"' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert list(rows[0]) == list(exports.EXPORT_COLUMNS)
+    assert [(row['order_id'], row['product_id'], row['quantity'], row['unit_price']) for row in rows] == [
+        ('1', '1', '2', '11.0'), ('1', '2', '1', '12.0'), ('2', '3', '4', '13.0'),
+    ]
+
+
+def test_ndjson_export_with_gzip_and_status_filter(app, orders, auth):
+    response = app.test_client().get('/api/admin/orders/export?format=ndjson&compress=gzip&status=shipped',
+                                     headers=auth(1))
+
+    assert response.mimetype == 'application/gzip'
+    assert 'filename="orders.ndjson.gz"' in response.headers['Content-Disposition']
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert [json.loads(line)['order_id'] for line in lines] == [2]
+    assert json.loads(lines[0])['product_name'] == 'Produto 3'
+
+
+def test_export_is_written_in_chunks(app, orders, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_CHUNK_BYTES', 64)
+    chunks = list(exports.export_orders('csv', yield_per=1))
+
+    assert len(chunks) > 1
+    assert b''.join(chunks).decode().count('\n') == 4
+
+
+def test_export_rejects_bad_requests(app, orders, auth):
+    client = app.test_client()
+    assert client.get('/api/admin/orders/export', headers=auth(2)).status_code == 403
+    assert client.get('/api/admin/orders/export?format=xml', headers=auth(1)).status_code == 400
+    assert client.get('/api/admin/orders/export?start=2026-13-01', headers=auth(1)).status_code == 400
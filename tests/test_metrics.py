@@ -0,0 +1,33 @@
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db
+
+
+def test_failed_statement_does_not_skew_request_timings(app, make_app):
+    metered = make_app(METRICS_ENABLED=True)
+
+    @metered.route('/_statements')
+    def statements():
+        try:
+            db.session.execute(text('SELECT * FROM missing_table'))
+        except OperationalError:
+            db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        db.session.execute(text('SELECT 2'))
+        return 'ok'
+
+    client = metered.test_client()
+    for _ in range(2):
+        response = client.get('/_statements')
+        timing = response.headers['Server-Timing']
+        # The failed statement is neither counted nor left behind on the connection
+        assert 'desc="2 statements"' in timing
+        db_ms, app_ms = (float(re.search(rf'{name};dur=([\d.]+)', timing).group(1)) for name in ('db', 'app'))
+        assert 0 <= db_ms <= app_ms
+
+    with metered.app_context():
+        with db.engine.connect() as connection:
+            assert 'query_started' not in connection.info
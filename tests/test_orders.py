@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import event
+
+from models import db
+from services import add_cart_item, place_order
+
+
+@pytest.fixture
+def orders(app, seed):
+    """Cinco pedidos do usuário 1; o pedido n tem n linhas de uma unidade"""
+    seed(products=5, users=2, stock=100)
+    for count in range(1, 6):
+        for product_id in range(1, count + 1):
+            add_cart_item(1, product_id, 1)
+        place_order(1, 'Rua Teste, 1', 'pix')
+
+
+def count_statements(call):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        return call(), len(statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_order_history_includes_items_and_summary(app, orders, auth):
+    response = app.test_client().get('/api/user/orders?include=items,summary', headers=auth(1))
+
+    assert response.status_code == 200
+    newest = response.json[0]
+    assert newest['id'] == 5
+    assert [item['product_id'] for item in newest['items']] == [1, 2, 3, 4, 5]
+    assert newest['items'][0] == {'product_id': 1, 'name': 'Produto 1', 'quantity': 1, 'price': 11.0}
+    assert (newest['line_count'], newest['item_count'], newest['first_product_name']) == (5, 5, 'Produto 1')
+
+    plain = app.test_client().get('/api/user/orders', headers=auth(1)).json
+    assert 'items' not in plain[0] and 'line_count' not in plain[0]
+
+
+def test_order_history_pages_with_cursor(app, orders, auth):
+    client = app.test_client()
+    seen, url = [], '/api/user/orders?limit=2&include=items'
+    while url:
+        response = client.get(url, headers=auth(1))
+        seen += [order['id'] for order in response.json]
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor:
+            assert 'rel="next"' in response.headers['Link']
+        url = cursor and f'/api/user/orders?limit=2&include=items&cursor={cursor}'
+
+    assert seen == [5, 4, 3, 2, 1]
+    assert client.get('/api/user/orders', headers=auth(2)).json == []
+
+
+def test_items_cost_the_same_statements_for_any_page_size(app, orders, auth):
+    client = app.test_client()
+    client.get('/api/user/orders?limit=1&include=items,summary', headers=auth(1))
+    _, small = count_statements(lambda: client.get('/api/user/orders?limit=1&include=items,summary', headers=auth(1)))
+    _, large = count_statements(lambda: client.get('/api/user/orders?limit=5&include=items,summary', headers=auth(1)))
+
+    assert small == large
+
+
+def test_unknown_include_and_bad_cursor_are_rejected(app, orders, auth):
+    client = app.test_client()
+    assert client.get('/api/user/orders?include=payments', headers=auth(1)).status_code == 400
+    assert client.get('/api/user/orders?cursor=not-a-cursor', headers=auth(1)).status_code == 400
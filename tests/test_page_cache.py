@@ -0,0 +1,62 @@
+from models import db, Product
+from services import page_cache
+
+
+def test_anonymous_page_is_shared_with_etag_and_304(app, seed):
+    seed(products=3)
+    client = app.test_client()
+
+    first = client.get('/')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+    assert first.cache_control.public and first.cache_control.s_maxage == app.config['PAGE_CACHE_MAX_AGE']
+
+    second = client.get('/')
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert page_cache.stats()['hits'] == 1
+
+    not_modified = client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+
+def test_age_verified_visitor_still_gets_the_shared_page(app, seed):
+    seed(products=3)
+    app.test_client().get('/products')
+
+    client = app.test_client()
+    response = client.post('/verify-age')
+    assert 'age_verified=1' in response.headers['Set-Cookie']
+    # Sessions from before the cookie still carry the old flag
+    with client.session_transaction() as session:
+        session['age_verified'] = True
+
+    hits = page_cache.stats()['hits']
+    response = client.get('/products')
+    assert page_cache.stats()['hits'] == hits + 1
+    assert response.cache_control.public
+    assert b'id="age-modal"' in response.data
+
+
+def test_logged_in_page_is_private(app, seed):
+    seed(products=3)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+
+    response = client.get('/')
+    assert response.cache_control.private and response.cache_control.no_cache
+    assert client.get('/', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_catalog_change_invalidates_pages(app, seed):
+    seed(products=3)
+    client = app.test_client()
+    before = client.get('/product/1')
+
+    db.session.get(Product, 1).name = 'Produto renomeado'
+    db.session.commit()
+
+    after = client.get('/product/1', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert 'Produto renomeado' in after.get_data(as_text=True)
@@ -0,0 +1,27 @@
+import pytest
+
+from services import query_plans
+from services.query_plans import ScenarioError, check_query_plans
+
+
+def test_endpoint_queries_use_indexes(app):
+    results = check_query_plans(app)
+
+    assert results
+    assert [(label, scans) for label, _, _, scans in results if scans] == []
+
+
+def test_failed_request_fails_the_scenario(app, monkeypatch):
+    monkeypatch.setattr(query_plans, 'endpoint_scenario', lambda user_id: [
+        ('GET /api/products', 'get', '/api/products', {}),
+        ('GET /api/products/<id>/related', 'get', '/api/products/999/related', {}),
+    ])
+    with pytest.raises(ScenarioError, match=r'related: HTTP 404'):
+        check_query_plans(app)
+
+
+def test_check_query_plans_command(app):
+    result = app.test_cli_runner().invoke(args=['check-query-plans'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Todas as consultas usam índices' in result.output
@@ -0,0 +1,51 @@
+import pytest
+
+from services import add_cart_item, build_recommendations, place_order
+
+pytest.importorskip('scipy')
+
+
+@pytest.fixture
+def purchases(app, seed):
+    seed(products=4, users=3, stock=100)
+    for user_id, product_ids in ((1, (1, 2)), (2, (1, 2)), (3, (1, 3))):
+        for product_id in product_ids:
+            add_cart_item(user_id, product_id, 1)
+        place_order(user_id, 'Rua Teste, 1', 'pix')
+
+
+def related_ids(client, product_id, limit=4):
+    response = client.get(f'/api/products/{product_id}/related?limit={limit}')
+    assert response.status_code == 200
+    return [product['id'] for product in response.json]
+
+
+def test_related_products_ranked_by_co_purchases(app, purchases):
+    stats = build_recommendations()
+    assert stats == {'lines': 6, 'orders': 3, 'products': 3, 'recommendations': 4}
+
+    client = app.test_client()
+    # Bought together twice beats once
+    assert related_ids(client, 1) == [2, 3]
+    assert related_ids(client, 1, limit=1) == [2]
+    assert related_ids(client, 3) == [1]
+
+
+def test_products_without_sales_fall_back_to_the_category(app, purchases):
+    build_recommendations()
+    client = app.test_client()
+
+    assert related_ids(client, 4) == [1, 2, 3]
+    assert client.get('/api/products/999/related').status_code == 404
+
+
+def test_rebuild_replaces_cached_recommendations(app, purchases):
+    client = app.test_client()
+    # Cached before the first build
+    assert related_ids(client, 3) == [1, 2, 4]
+
+    build_recommendations()
+    assert related_ids(client, 3) == [1]
+    build_recommendations(min_support=2)
+    assert related_ids(client, 1) == [2]
+    assert related_ids(client, 3) == [1, 2, 4]
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import insert, select
+
+from models import db, CartItem, Category, Product, User
+from services import add_cart_item, place_order
+
+
+@pytest.fixture
+def replicated(app, seed, make_app, tmp_path):
+    """Aplicação com uma réplica cujo conteúdo difere do primário"""
+    seed(products=1, users=2)
+    add_cart_item(1, 1, 1)
+    place_order(1, 'Rua Teste, 1', 'pix')
+
+    replicated = make_app(DATABASE_REPLICA_URLS=[f'sqlite:///{tmp_path}/replica.db'],
+                          CATALOG_CACHE_ENABLED=False, PAGE_CACHE_ENABLED=False)
+    with replicated.app_context():
+        replica = db.engines['replica_0']
+        db.metadata.create_all(replica)
+        with replica.begin() as connection:
+            connection.execute(insert(Category), [{'name': 'Whiskies'}])
+            connection.execute(insert(Product), [{'name': 'Produto da réplica', 'price': 1.0, 'category_id': 1}])
+            connection.execute(insert(User), [{'email': f'user{i}@test', 'password': '-'} for i in (1, 2)])
+    yield replicated
+    # db is shared by every app in the process; later apps have no replica bind
+    db.metadatas.pop('replica_0', None)
+
+
+def names(response):
+    return [product['name'] for product in response.json]
+
+
+def test_catalog_and_history_read_from_the_replica(replicated, auth):
+    client = replicated.test_client()
+
+    assert names(client.get('/api/products')) == ['Produto da réplica']
+    # The order exists only on the primary, which has not replicated it yet
+    assert client.get('/api/user/orders', headers=auth(1)).json == []
+
+
+def test_user_reads_primary_after_writing(replicated, auth):
+    client = replicated.test_client()
+    assert client.post('/api/cart/add', json={'product_id': 1, 'quantity': 1}, headers=auth(1)).status_code == 200
+
+    assert [order['id'] for order in client.get('/api/user/orders', headers=auth(1)).json] == [1]
+    # Other users keep reading from the replica
+    assert client.get('/api/user/orders', headers=auth(2)).json == []
+    with replicated.app_context():
+        assert db.session.scalar(select(CartItem.quantity).where(CartItem.cart_id == 2)) == 1
+        with db.engines['replica_0'].connect() as connection:
+            assert connection.scalar(select(CartItem.id)) is None
+
+
+def test_catalog_change_pins_catalog_reads_to_primary(replicated):
+    client = replicated.test_client()
+    with replicated.app_context():
+        db.session.get(Product, 1).name = 'Produto renomeado'
+        db.session.commit()
+
+    assert names(client.get('/api/products')) == ['Produto renomeado']
+
+
+def test_without_replicas_everything_reads_the_primary(app, seed, auth):
+    seed(products=1)
+    add_cart_item(1, 1, 1)
+    place_order(1, 'Rua Teste, 1', 'pix')
+
+    assert [order['id'] for order in app.test_client().get('/api/user/orders', headers=auth(1)).json] == [1]
@@ -0,0 +1,34 @@
+import time
+
+from models import db, Product
+from services import add_cart_item, place_order, reservation_sweeper
+
+
+def test_sweeper_starts_on_first_request_and_applies_sales(app, seed, make_app):
+    seed(stock=5)
+    add_cart_item(1, 1, 2)
+    place_order(1, 'Rua Teste, 1', 'pix')
+
+    served = make_app(RESERVATION_SWEEP_INTERVAL=0.05)
+    state = served.extensions['reservation_sweeper']
+    assert state['thread'] is None
+    try:
+        served.test_client().get('/api/categories')
+        thread = state['thread']
+        assert thread is not None and thread.is_alive()
+        served.test_client().get('/api/categories')
+        assert state['thread'] is thread
+
+        deadline = time.monotonic() + 5
+        while db.session.get(Product, 1).stock != 3 and time.monotonic() < deadline:
+            db.session.expire_all()
+            time.sleep(0.05)
+        assert db.session.get(Product, 1).stock == 3
+    finally:
+        reservation_sweeper.stop(served)
+    assert not thread.is_alive()
+
+
+def test_sweeper_disabled_without_interval(app):
+    app.test_client().get('/api/categories')
+    assert app.extensions['reservation_sweeper']['thread'] is None
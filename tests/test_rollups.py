@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import func, select
+
+from models import db, OrderItem, SalesDaily, User
+from services import add_cart_item, catch_up_rollups, place_order, rebuild_rollups, sales_analytics
+
+
+@pytest.fixture
+def orders(app, seed):
+    seed(products=3, users=3, stock=100)
+    for user_id, lines in ((1, {1: 2, 2: 1}), (2, {2: 3}), (3, {1: 1, 3: 4})):
+        for product_id, quantity in lines.items():
+            add_cart_item(user_id, product_id, quantity)
+        place_order(user_id, 'Rua Teste, 1', 'pix')
+
+
+def test_checkout_leaves_rollups_to_the_job(orders):
+    assert db.session.scalar(select(func.count()).select_from(SalesDaily)) == 0
+    # Orders younger than the settle window wait for the next run
+    assert catch_up_rollups()['orders'] == 0
+
+
+def test_catch_up_and_rebuild_match_the_orders(orders):
+    revenue, units = db.session.execute(
+        select(func.sum(OrderItem.price * OrderItem.quantity), func.sum(OrderItem.quantity))
+    ).one()
+
+    assert catch_up_rollups(settle_seconds=0)['orders'] == 3
+    caught_up = sales_analytics()
+    assert caught_up['totals'] == {'revenue': round(revenue, 2), 'units': units, 'orders': 3}
+    assert {p['product_id']: p['units'] for p in caught_up['top_products']} == {1: 3, 2: 4, 3: 4}
+    # Already counted orders are not added twice
+    assert catch_up_rollups(settle_seconds=0)['orders'] == 0
+
+    rebuild_rollups()
+    assert catch_up_rollups(settle_seconds=0)['orders'] == 3
+    rebuilt = sales_analytics()
+    assert {key: rebuilt[key] for key in ('totals', 'days', 'categories', 'top_products')} == \
+        {key: caught_up[key] for key in ('totals', 'days', 'categories', 'top_products')}
+
+
+def test_analytics_api_reads_rollups_for_admins(app, orders, auth):
+    db.session.get(User, 1).is_admin = True
+    db.session.commit()
+    catch_up_rollups(settle_seconds=0)
+    client = app.test_client()
+
+    response = client.get('/api/admin/analytics?limit=2', headers=auth(1))
+    assert response.status_code == 200
+    assert response.json['totals']['orders'] == 3
+    assert [p['product_id'] for p in response.json['top_products']] == [3, 2]
+    assert response.json['watermark']['last_order_id'] == 3
+
+    assert client.get('/api/admin/analytics', headers=auth(2)).status_code == 403
+    assert client.get('/api/admin/analytics?start=2026-02-30', headers=auth(1)).status_code == 400
@@ -0,0 +1,16 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import sqlite_stress
+
+
+def test_tuned_sqlite_has_no_lock_errors_under_concurrent_checkouts():
+    # A short run of benchmarks/sqlite_stress.py: writer and reader processes on one file
+    summary = sqlite_stress.run_mode('tuned', argparse.Namespace(writers=4, readers=2, duration=3.0, products=200))
+
+    for role, result in summary.items():
+        assert result['ops'] > 0, role
+        assert (result['lock_errors'], result['other_errors']) == (0, 0), (role, result)